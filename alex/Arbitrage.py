@@ -0,0 +1,222 @@
+from typing import Dict, List, Mapping, Tuple
+from collections import defaultdict
+from datamodel import Order, TradingState
+from Basket import BasketSpread, size_basket, SELL_BASKET, BUY_BASKET
+
+# Author: Alex Morrow
+# Spread arbitrage between a basket (or any ETF-like product) and its legs, driven by configuration instead of a
+# copy of the basket code per round. Each BasketConfig gives the legs, premium and bands; the engine computes the
+# spread, keeps its streaming statistics, and sizes all legs together from the book and position limits:
+#
+#   self.arbitrage = ArbitrageEngine([GIFT_BASKET], self.position_limits)
+#   ...
+#   for product, orders in self.arbitrage.run(state, result).items():     # after the Trader's other orders
+#       result[product] = result.get(product, []) + orders
+
+
+class BasketConfig:
+    """
+    One basket-vs-legs spread trade.
+
+    The spread is basket_units * basket mid - sum(weight * leg mid) - premium. With std unset the bands are a
+    rolling mean +/- k rolling std over `window` spreads (Round3). With std set they are fixed at 0 +/- k * std,
+    i.e. the premium is the fair spread (StanfordCardinals).
+
+    A position is opened once the spread leaves the entry band, in units whose executed spread still beats the mean,
+    and closed once it comes back past mean +/- exit_k * std (exit_k < 0 waits for it to overshoot).
+
+    Args:
+        basket (str): Basket product.
+        weights (Dict[str, int]): Leg -> units per basket unit.
+        premium (float, optional): Constant subtracted from the spread.
+        basket_units (int, optional): Baskets per unit, for non-integer ratios.
+        window (int, optional): Rolling window in ticks.
+        entry_k (float, optional): Entry band width in stds.
+        exit_k (float, optional): Exit level in stds from the mean.
+        std (float, optional): Fixed spread std, instead of the rolling one.
+        ddof (int, optional): Delta degrees of freedom of the rolling std, 0 like np.std.
+    """
+
+    def __init__(self, basket: str, weights: Dict[str, int], premium: float = 0.0, basket_units: int = 1,
+                 window: int = 48, entry_k: float = 3.1, exit_k: float = 0.0, std: float = None, ddof: int = 0):
+        self.basket = basket
+        self.weights = dict(weights)
+        self.premium = premium
+        self.basket_units = basket_units
+        self.window = window
+        self.entry_k = entry_k
+        self.exit_k = exit_k
+        self.std = std
+        self.ddof = ddof
+
+    @property
+    def products(self) -> List[str]:
+        return [self.basket] + list(self.weights)
+
+
+# Baskets the Traders so far have hard-coded, with the same spread, bands and exits. Unlike the originals, every
+# preset trades all legs: Round3 does, but StanfordCardinals only trades PICNIC_BASKET or PINA_COLADAS and leaves the
+# legs unhedged. PICNIC_BASKET never closes at the premium (close_at = -1000 std), only flips at the other band.
+GIFT_BASKET = BasketConfig('GIFT_BASKET', {'CHOCOLATE': 4, 'STRAWBERRIES': 6, 'ROSES': 1}, window=48, entry_k=3.1)
+PICNIC_BASKET = BasketConfig('PICNIC_BASKET', {'DIP': 4, 'BAGUETTE': 2, 'UKULELE': 1}, premium=375, entry_k=0.5, exit_k=-1000, std=117)
+PINA_COLADAS = BasketConfig('PINA_COLADAS', {'COCONUTS': 15}, basket_units=8, entry_k=1.0, exit_k=-0.5, std=8 * 25)
+
+
+class ArbitrageEngine:
+    """
+    Runs any number of BasketConfigs each tick and returns the combined orders.
+
+    Baskets are processed in order and share the position limits: each basket is sized against the positions plus
+    what the Trader and earlier baskets already ordered on the same side, so the combined orders never trip the
+    exchange's limit check and cancel one leg while the others fill. Legs shared by two baskets are sized against the
+    full visible book for each, the matcher then fills them level by level.
+
+    Args:
+        configs (List[BasketConfig]): Baskets to trade.
+        limits (Mapping[str, int]): Position limits per product.
+    """
+
+    def __init__(self, configs: List[BasketConfig], limits: Mapping[str, int]):
+        self.configs = configs
+        self.limits = dict(limits)
+        # One per config, in the same order, so two configs on the same basket keep separate statistics
+        self.spreads: List[BasketSpread] = [
+            BasketSpread(config.weights, config.window, config.basket, config.ddof, config.premium, config.basket_units)
+            for config in configs]
+
+    def bands(self, index: int) -> Tuple[float, float, float, float]:
+        """
+        (lower entry band, mean, upper entry band, std) of configs[index]'s spread, None until the window is full.
+        """
+        config = self.configs[index]
+        if config.std is not None:
+            return -config.entry_k * config.std, 0.0, config.entry_k * config.std, config.std
+        spread = self.spreads[index]
+        if not spread.ready:
+            return None
+        lower, mean, upper = spread.bands(config.entry_k)
+        return lower, mean, upper, spread.std
+
+    def decide(self, index: int, value: float, position: int) -> Tuple[int, float, int]:
+        """
+        (side, threshold, max_units) to trade for configs[index], None to stay put.
+        """
+        config = self.configs[index]
+        bands = self.bands(index)
+        if bands is None:
+            return None
+        lower, mean, upper, std = bands
+        open_units = int(position / config.basket_units)
+        if value > upper:
+            return SELL_BASKET, mean, None
+        if value < lower:
+            return BUY_BASKET, mean, None
+        if open_units < 0 and value <= mean + config.exit_k * std:
+            return BUY_BASKET, mean + config.exit_k * std, -open_units
+        if open_units > 0 and value >= mean - config.exit_k * std:
+            return SELL_BASKET, mean - config.exit_k * std, open_units
+        return None
+
+    def run(self, state: TradingState, result: Mapping[str, List[Order]] = None) -> Dict[str, List[Order]]:
+        """
+        Update every spread with this tick's mids and return the orders of all baskets, by product.
+
+        Args:
+            state (TradingState): This tick's state.
+            result (Mapping[str, List[Order]], optional): Orders the Trader already placed this tick, e.g.
+                StanfordCardinals' Olivia UKULELE orders. Their quantities count against the limits when sizing, they
+                are not included in the returned orders.
+        """
+        orders: Dict[str, List[Order]] = defaultdict(list)
+        bought: Dict[str, int] = defaultdict(int)
+        sold: Dict[str, int] = defaultdict(int)
+        for product, product_orders in (result or {}).items():
+            for order in product_orders:
+                if order.quantity > 0:
+                    bought[product] += order.quantity
+                else:
+                    sold[product] -= order.quantity
+        for index, config in enumerate(self.configs):
+            depths = state.order_depths
+            mids = {}
+            for product in config.products:
+                depth = depths.get(product)
+                mids[product] = depth.mid_price if depth is not None else None
+            if any(mid is None for mid in mids.values()):
+                continue
+            value = self.spreads[index].push(mids)
+
+            decision = self.decide(index, value, state.position.get(config.basket, 0))
+            if decision is None:
+                continue
+            side, threshold, max_units = decision
+
+            # Count what the Trader and earlier baskets already ordered in the direction this one trades each leg
+            positions = {}
+            for product in config.products:
+                position = state.position.get(product, 0)
+                buys = (side if product == config.basket else -side) > 0
+                positions[product] = position + bought[product] if buys else position - sold[product]
+
+            size = size_basket(depths, side, threshold, positions, self.limits, config.weights, config.basket,
+                               config.premium, config.basket_units, max_units)
+            for product, product_orders in size.orders().items():
+                orders[product].extend(product_orders)
+                for order in product_orders:
+                    if order.quantity > 0:
+                        bought[product] += order.quantity
+                    else:
+                        sold[product] -= order.quantity
+        return dict(orders)
+
+
+
+def check_engine(ticks: int = 2000, seed: int = 0, configs: List[BasketConfig] = None,
+                 limits: Mapping[str, int] = None) -> Tuple[int, int, int, int]:
+    """
+    Replay a synthetic basket day (with some one-sided ticks) through the Backtester with a Trader that only runs an
+    ArbitrageEngine, and check after every tick that each leg's position is exactly -weight times the basket's.
+
+    Args:
+        configs (List[BasketConfig], optional): Baskets to trade. Defaults to GIFT_BASKET with 1 std bands, the
+            preset's 3.1 rarely opens on the synthetic walk.
+        limits (Mapping[str, int], optional): Position limits, defaults to the Backtester's.
+
+    Returns:
+        Tuple[int, int, int, int]: (ticks with an unhedged leg, trades, rejected order batches, largest basket
+        position).
+    """
+    from Backtester import Backtester, POSITION_LIMITS
+    from LazyState import BookTicks
+    from Profiler import LatencyProfiler
+    from Signals import synthetic_basket_day
+    configs = configs or [BasketConfig(GIFT_BASKET.basket, GIFT_BASKET.weights, window=GIFT_BASKET.window,
+                                       entry_k=1.0, exit_k=-0.5)]
+    limits = dict(limits or POSITION_LIMITS)
+
+    class Trader:
+        def __init__(self):
+            self.arbitrage = ArbitrageEngine(configs, limits)
+
+        def run(self, state: TradingState):
+            return self.arbitrage.run(state), 0, ''
+
+    result = Backtester(Trader, BookTicks(synthetic_basket_day(ticks, seed, gaps=0.01)), limits,
+                        profiler=LatencyProfiler(enabled=False)).run()
+    unhedged, largest = 0, 0
+    for tick in range(len(result.timestamps)):
+        for config in configs:
+            baskets = result.position[config.basket][tick] / config.basket_units
+            largest = max(largest, abs(result.position[config.basket][tick]))
+            unhedged += any(result.position[leg][tick] != -weight * baskets for leg, weight in config.weights.items())
+    return unhedged, len(result.trades), len(result.rejections), largest
+
+
+if __name__ == '__main__':
+    # Tight limits with STRAWBERRIES the binding leg, so sizing runs into them
+    tight = {'GIFT_BASKET': 10, 'CHOCOLATE': 40, 'STRAWBERRIES': 45, 'ROSES': 10}
+    for seed, limits in ((0, None), (1, None), (2, None), (0, tight), (2, tight)):
+        unhedged, trades, rejections, largest = check_engine(seed=seed, limits=limits)
+        print(f"seed {seed}, {'tight' if limits else 'Backtester'} limits: {trades} trades, basket position up to "
+              f"{largest}, {rejections} rejections, {unhedged} ticks with an unhedged leg")
+        assert trades > 0 and unhedged == 0 and rejections == 0, "ArbitrageEngine left a leg unhedged"
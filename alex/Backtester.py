@@ -0,0 +1,525 @@
+from typing import Callable, Dict, List, Tuple, Any
+from datamodel import OrderDepth, TradingState, Order, Trade, Listing, Observation, ConversionObservation
+from Conversion import STORAGE_COST
+from OrderBookStore import LEVELS, OBSERVATION_COLUMNS, SUBMISSION, DayBook, load_book, load_observations, sniff_separator
+from LazyState import BookTicks
+from PnLEngine import PnLEngine
+from Profiler import PROFILER, LatencyProfiler, activate
+from StateMonitor import StateMonitor, StateLimitExceeded
+import argparse
+import csv
+import functools
+import importlib.util
+import jsonpickle
+import os
+import sys
+import time
+
+# Author: Alex Morrow
+# Local replay of the price-level CSVs (DayData/Day_*.csv, Round2Day1.csv, Round3Data.csv) through any Trader.run
+
+POSITION_LIMITS = {'STARFRUIT': 20, 'AMETHYSTS': 20, 'ORCHIDS': 100, 'CHOCOLATE': 250, 'STRAWBERRIES': 350, 'ROSES': 60, 'GIFT_BASKET': 60}
+DEFAULT_LIMIT = 20
+
+
+class Tick:
+    """
+    One timestamp of book data for every product in the file.
+
+    bids/asks are lists of (price, volume) with the best level first and all volumes positive,
+    exactly as they appear in the CSV.
+    """
+
+    def __init__(self, day: int, timestamp: int):
+        self.day = day
+        self.timestamp = timestamp
+        self.bids: Dict[str, List[Tuple[int, int]]] = {}
+        self.asks: Dict[str, List[Tuple[int, int]]] = {}
+        self.mid_prices: Dict[str, float] = {}
+        self.conversion_observations: Dict[str, ConversionObservation] = {}
+
+    def order_depths(self) -> Dict[str, OrderDepth]:
+        """
+        Build fresh OrderDepths in the platform convention (sell volumes negative, best level inserted first).
+        """
+        depths = {}
+        for product in self.bids:
+            depth = OrderDepth()
+            for price, vol in self.bids[product]:
+                depth.buy_orders[price] = vol
+            for price, vol in self.asks[product]:
+                depth.sell_orders[price] = -vol
+            depths[product] = depth
+        return depths
+
+    def market_trades(self) -> Dict[str, List[Trade]]:
+        # The price-level CSVs carry no trades
+        return {}
+
+    def observations(self) -> Observation:
+        return Observation({}, dict(self.conversion_observations))
+
+
+def _to_int(value: str):
+    return int(float(value)) if value not in ('', None) else None
+
+
+def load_day_csv(path: str) -> List[Tick]:
+    """
+    Parse a price-level CSV into time-ordered ticks.
+
+    Args:
+        path (str): Path to a file with day, timestamp, product, bid/ask_price_1..3, bid/ask_volume_1..3 and mid_price
+            columns. Both the comma separated files in this repo and the semicolon separated platform exports work,
+            and the column order does not matter.
+
+    Returns:
+        List[Tick]: One Tick per (day, timestamp), sorted.
+    """
+    delimiter = sniff_separator(path)
+    with open(path, newline='') as f:
+        ticks: Dict[Tuple[int, int], Tick] = {}
+        for row in csv.DictReader(f, delimiter=delimiter):
+            day = int(row['day'])
+            timestamp = int(row['timestamp'])
+            tick = ticks.get((day, timestamp))
+            if tick is None:
+                tick = ticks[(day, timestamp)] = Tick(day, timestamp)
+            product = row['product']
+            bids, asks = [], []
+            for level in range(1, LEVELS + 1):
+                bid_price, bid_vol = _to_int(row[f'bid_price_{level}']), _to_int(row[f'bid_volume_{level}'])
+                if bid_price is not None and bid_vol:
+                    bids.append((bid_price, abs(bid_vol)))
+                ask_price, ask_vol = _to_int(row[f'ask_price_{level}']), _to_int(row[f'ask_volume_{level}'])
+                if ask_price is not None and ask_vol:
+                    asks.append((ask_price, abs(ask_vol)))
+            tick.bids[product] = bids
+            tick.asks[product] = asks
+            tick.mid_prices[product] = float(row['mid_price'])
+    return [ticks[key] for key in sorted(ticks)]
+
+
+def ticks_from_book(book: DayBook) -> List[Tick]:
+    """
+    Same ticks as load_day_csv, built from the columnar cache instead of the CSV.
+    """
+    ticks = [Tick(day, timestamp) for day, timestamp in zip(book.tick_day.tolist(), book.tick_timestamp.tolist())]
+    for product, pbook in book.products.items():
+        # Bulk conversion, row-wise access into memory-mapped arrays is far slower than one tolist per column
+        bid_price, bid_volume = pbook.bid_price.tolist(), pbook.bid_volume.tolist()
+        ask_price, ask_volume = pbook.ask_price.tolist(), pbook.ask_volume.tolist()
+        mid_price = pbook.mid_price.tolist()
+        for i, row in enumerate(book.rows[product].tolist()):
+            if row < 0:
+                continue
+            tick = ticks[i]
+            tick.bids[product] = [(p, v) for p, v in zip(bid_price[row], bid_volume[row]) if v > 0]
+            tick.asks[product] = [(p, v) for p, v in zip(ask_price[row], ask_volume[row]) if v > 0]
+            tick.mid_prices[product] = mid_price[row]
+    for product, columns in book.observations.items():
+        values = [columns[name].tolist() for name in OBSERVATION_COLUMNS]
+        for tick, row in zip(ticks, zip(*values)):
+            if row[0] == row[0]:    # NaN where the tick has no observation
+                tick.conversion_observations[product] = ConversionObservation(*row)
+    return ticks
+
+
+def load_trader(path: str):
+    """
+    Import the Trader class from a strategy file, e.g. Round3.py or ../Sam/330Strategy2.py.
+
+    The strategy's own folder and this folder are put on sys.path so `from datamodel import ...` resolves even for
+    folders without their own datamodel.py. File names starting with digits are fine.
+    """
+    path = os.path.abspath(path)
+    for folder in (os.path.dirname(os.path.abspath(__file__)), os.path.dirname(path)):
+        if folder not in sys.path:
+            sys.path.append(folder)
+    name = 'strategy_' + ''.join(c if c.isalnum() else '_' for c in os.path.splitext(os.path.basename(path))[0])
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module.Trader
+
+
+@functools.lru_cache(maxsize=None)
+def cached_trader(strategy: str):
+    """
+    load_trader, once per strategy file per process.
+    """
+    return load_trader(strategy)
+
+
+@functools.lru_cache(maxsize=8)
+def cached_ticks(path: str) -> BookTicks:
+    """
+    Lazy ticks of a data file, kept for the next backtest on the same file in this process.
+    """
+    return BookTicks(load_book(path))
+
+
+def build_caches(paths: List[str]) -> None:
+    """
+    Build the .npy caches of every data file up front, so pool workers do not race on writing them.
+    """
+    for path in paths:
+        load_book(path)
+
+
+def exceeds_limit(orders: List[Order], position: int, limit: int) -> bool:
+    """
+    True when all buys (or all sells) filling would take the position past the limit, which makes the exchange
+    cancel every order for the product.
+    """
+    total_buy = sum(order.quantity for order in orders if order.quantity > 0)
+    total_sell = sum(-order.quantity for order in orders if order.quantity < 0)
+    return position + total_buy > limit or position - total_sell < -limit
+
+
+def match_orders(product: str, orders: List[Order], depth: OrderDepth, position: int, limit: int, timestamp: int) -> List[Trade]:
+    """
+    Match one product's orders against the book the Trader saw.
+
+    Mirrors the exchange: orders that exceed_limit are all cancelled. Orders fill at the book price, level by
+    level, and consume the volume they take so two orders cannot fill against the same quote.
+
+    Returns:
+        List[Trade]: Own trades, buyer/seller set to SUBMISSION on our side.
+    """
+    if exceeds_limit(orders, position, limit):
+        return []
+
+    asks = depth.ask_ladder
+    bids = depth.bid_ladder
+    ask_left = {price: -vol for price, vol in asks.items()}
+    bid_left = dict(bids)
+
+    trades = []
+    for order in orders:
+        remaining = abs(order.quantity)
+        if order.quantity > 0:
+            for ask in asks:
+                if ask > order.price or remaining == 0:
+                    break
+                fill = min(remaining, ask_left[ask])
+                if fill > 0:
+                    ask_left[ask] -= fill
+                    remaining -= fill
+                    trades.append(Trade(product, ask, fill, SUBMISSION, '', timestamp))
+        elif order.quantity < 0:
+            for bid in bids:
+                if bid < order.price or remaining == 0:
+                    break
+                fill = min(remaining, bid_left[bid])
+                if fill > 0:
+                    bid_left[bid] -= fill
+                    remaining -= fill
+                    trades.append(Trade(product, bid, fill, '', SUBMISSION, timestamp))
+    return trades
+
+
+class BacktestResult:
+    """
+    Per-tick record of one replay.
+    """
+
+    def __init__(self, products: List[str]):
+        self.products = products
+        self.timestamps: List[int] = []
+        self.pnl: Dict[str, List[float]] = {product: [] for product in products}
+        self.position: Dict[str, List[int]] = {product: [] for product in products}
+        self.trades: List[Trade] = []
+        self.run_times: List[float] = []
+        self.latency = None     # Profiler report, filled in when the run was profiled
+        self.state = None       # StateMonitor of the run, when one was attached
+        self.ledger = None      # PnLEngine with realized/unrealized PnL and average cost per product
+        self.conversions: List[Tuple[int, str, int]] = []   # (timestamp, product, signed quantity converted)
+        self.rejections: List[Tuple[int, str, str]] = []    # (timestamp, product, why) of cancelled orders and conversions
+
+    def total_pnl(self) -> List[float]:
+        return [sum(values) for values in zip(*self.pnl.values())] if self.products else []
+
+    def max_drawdown(self) -> float:
+        """
+        Largest peak-to-trough fall of total PnL.
+        """
+        peak, drawdown = float('-inf'), 0.0
+        for pnl in self.total_pnl():
+            peak = max(peak, pnl)
+            drawdown = max(drawdown, peak - pnl)
+        return drawdown
+
+    def max_position(self) -> Dict[str, int]:
+        return {product: max((abs(p) for p in positions), default=0) for product, positions in self.position.items()}
+
+    def final_pnl(self) -> Dict[str, float]:
+        return {product: (values[-1] if values else 0.0) for product, values in self.pnl.items()}
+
+    def summary_row(self, seconds: float = None) -> Dict[str, Any]:
+        """
+        One results-table row: pnl, trades, max_position, max_drawdown, seconds (when given) and pnl_<product>.
+        """
+        total = self.total_pnl()
+        row = {
+            'pnl': total[-1] if total else 0.0,
+            'trades': len(self.trades),
+            'max_position': max(self.max_position().values(), default=0),
+            'max_drawdown': self.max_drawdown(),
+        }
+        if seconds is not None:
+            row['seconds'] = seconds
+        for product, pnl in self.final_pnl().items():
+            row[f'pnl_{product}'] = pnl
+        return row
+
+    def summary(self) -> str:
+        lines = []
+        for product, pnl in self.final_pnl().items():
+            traded = self.ledger.accounts[product].volume if self.ledger and product in self.ledger.accounts else 0
+            lines.append(f"{product}: pnl {pnl:.1f}, volume {traded}, final position {self.position[product][-1] if self.position[product] else 0}")
+        total = self.total_pnl()
+        lines.append(f"TOTAL: {total[-1] if total else 0.0:.1f}")
+        if self.rejections:
+            lines.append(f"rejected: {len(self.rejections)} order batches or conversions, first at {self.rejections[0][0]} ({self.rejections[0][1]}: {self.rejections[0][2]})")
+        if self.run_times:
+            lines.append(f"run(): {len(self.run_times)} ticks, mean {1000 * sum(self.run_times) / len(self.run_times):.3f} ms, max {1000 * max(self.run_times):.3f} ms")
+        return '\n'.join(lines)
+
+
+class Backtester:
+    """
+    Event-driven replay: for each tick build a TradingState, call Trader.run, match the orders, update positions
+    and feed traderData back on the next tick.
+
+    Args:
+        trader_cls: The Trader class, or any zero-argument callable returning a Trader. A fresh Trader is made per run
+            just like the platform.
+        ticks: Output of load_day_csv or ticks_from_book, or BookTicks(book) to build each product's OrderDepth
+            only when the Trader reads it.
+        position_limits (Dict[str, int], optional): Overrides for POSITION_LIMITS.
+        verbose (bool, optional): Let the Trader's prints through, and print cancelled orders and ignored conversions
+            as they happen (they are always kept in BacktestResult.rejections). Defaults to False since printing
+            dominates run time.
+        log_file (str, optional): Write the Trader's prints to this file instead, e.g. for Logger.parse_logs. The file
+            is rewritten by every run(). Cannot be combined with verbose.
+        profiler (LatencyProfiler, optional): Profiler the Trader's sections report to, closed once per tick. It is
+            made the active profiler for the run, so Profiler.section and Profiler.timed in the Trader record into
+            it. Defaults to the shared Profiler.PROFILER, pass LatencyProfiler(enabled=False) to skip profiling.
+        state_monitor (StateMonitor, optional): Records traderData size and codec time every tick and raises
+            StateLimitExceeded out of run() when one of its ceilings is crossed.
+        on_tick (Callable, optional): Called after every tick with (timestamp, pnl, position), both dicts by product,
+            e.g. to stream progress out of a worker process.
+        storage_costs (Dict[str, float], optional): Cost per unit per tick of holding a long position, for products
+            with conversion observations. Defaults to STORAGE_COST for ORCHIDS.
+
+    Ticks that carry conversion observations (DayBook.join_observations) populate state.observations, and the
+    conversions returned by run() are executed against them before that tick's orders are matched: a request only
+    reduces the position, imports at askPrice + transportFees + importTariff and exports at
+    bidPrice - transportFees - exportTariff.
+    """
+
+    def __init__(self, trader_cls, ticks: List[Tick], position_limits: Dict[str, int] = None, verbose: bool = False,
+                 profiler: LatencyProfiler = None, state_monitor: StateMonitor = None, log_file: str = None,
+                 on_tick: Callable[[int, Dict[str, float], Dict[str, int]], None] = None,
+                 storage_costs: Dict[str, float] = None):
+        if verbose and log_file:
+            raise ValueError('verbose prints to the terminal, it cannot be combined with log_file')
+        self.trader_cls = trader_cls
+        self.ticks = ticks
+        self.position_limits = dict(POSITION_LIMITS)
+        if position_limits:
+            self.position_limits.update(position_limits)
+        self.verbose = verbose
+        self.log_file = log_file
+        self.profiler = profiler if profiler is not None else PROFILER
+        self.state_monitor = state_monitor
+        self.on_tick = on_tick
+        self.storage_costs = storage_costs if storage_costs is not None else {'ORCHIDS': STORAGE_COST}
+
+    def run(self) -> BacktestResult:
+        trader = self.trader_cls()
+        products = getattr(self.ticks, 'products', None) or sorted({product for tick in self.ticks for product in tick.mid_prices})
+        result = BacktestResult(products)
+        listings = {product: Listing(product, product, 'SEASHELLS') for product in products}
+
+        ledger = PnLEngine(record=True)
+        position = {product: 0 for product in products}
+        own_trades: Dict[str, List[Trade]] = {}
+        trader_data = ''
+
+        self.profiler.reset()
+        previous_profiler = activate(self.profiler)
+        result.state = self.state_monitor
+        result.ledger = ledger
+        sink = open(self.log_file or os.devnull, 'w') if not self.verbose else None
+        try:
+            for tick in self.ticks:
+                depths = tick.order_depths()
+                observations = tick.observations()
+                state = TradingState(trader_data, tick.timestamp, listings, depths, own_trades, tick.market_trades(),
+                                     {product: qty for product, qty in position.items() if qty != 0},
+                                     observations)
+
+                start = time.perf_counter()
+                stdout = sys.stdout
+                if sink is not None:
+                    sys.stdout = sink
+                try:
+                    output = trader.run(state)
+                finally:
+                    sys.stdout = stdout
+                run_time = time.perf_counter() - start
+                result.run_times.append(run_time)
+
+                orders, conversions, trader_data = self.unpack_output(output, trader_data)
+                if self.state_monitor is not None:
+                    self.state_monitor.record(tick.timestamp, trader_data, self.profiler.current)
+                self.profiler.end_tick(tick.timestamp, run_time)
+
+                for product, observation in observations.conversionObservations.items():
+                    held = position.get(product, 0)
+                    if held > 0:
+                        ledger.charge(product, self.storage_costs.get(product, 0.0) * held)
+                    if conversions and held and (conversions > 0) == (held > 0):
+                        self.reject(result, tick.timestamp, product, f"conversion of {conversions} does not reduce position {held}, ignored")
+                    converted = self.convert(product, conversions, held, observation, ledger)
+                    position[product] = held + converted
+                    conversions -= converted
+                    result.conversions.append((tick.timestamp, product, converted))
+
+                # Match against the book as it was shown to the Trader, not after any mutation it made
+                fresh_depths = tick.order_depths()
+                own_trades = {}
+                for product, product_orders in orders.items():
+                    if product not in fresh_depths or not product_orders:
+                        continue
+                    limit = self.position_limits.get(product, DEFAULT_LIMIT)
+                    if exceeds_limit(product_orders, position[product], limit):
+                        self.reject(result, tick.timestamp, product, f"orders exceed limit {limit} (position {position[product]}), cancelling all")
+                        continue
+                    trades = match_orders(product, product_orders, fresh_depths[product], position[product], limit, tick.timestamp)
+                    ledger.book_trades(trades)
+                    position[product] = ledger.position(product)
+                    if trades:
+                        own_trades[product] = trades
+                        result.trades.extend(trades)
+
+                result.timestamps.append(tick.timestamp)
+                ledger.mark(tick.mid_prices, tick.timestamp)
+                for product in products:
+                    result.pnl[product].append(ledger.total(product))
+                    result.position[product].append(position[product])
+                if self.on_tick is not None:
+                    self.on_tick(tick.timestamp, {product: result.pnl[product][-1] for product in products}, dict(position))
+        finally:
+            if sink is not None:
+                sink.close()
+            activate(previous_profiler)
+        if self.profiler.enabled:
+            result.latency = self.profiler.report()
+        return result
+
+    def reject(self, result: BacktestResult, timestamp: int, product: str, why: str) -> None:
+        result.rejections.append((timestamp, product, why))
+        if self.verbose:
+            print(f"{product} at {timestamp}: {why}", file=sys.stderr)
+
+    @staticmethod
+    def convert(product: str, conversions: int, held: int, observation: ConversionObservation, ledger: PnLEngine) -> int:
+        """
+        Execute a conversion request against the island and book it. Returns the signed quantity converted, 0 for a
+        request that would not bring the position closer to 0.
+        """
+        if not conversions or held == 0 or (conversions > 0) == (held > 0):
+            return 0
+        quantity = max(conversions, -held) if held > 0 else min(conversions, -held)
+        if quantity > 0:
+            ledger.convert(product, quantity, observation.askPrice, quantity * (observation.transportFees + observation.importTariff))
+        else:
+            ledger.convert(product, quantity, observation.bidPrice, -quantity * (observation.transportFees + observation.exportTariff))
+        return quantity
+
+    @staticmethod
+    def unpack_output(output: Any, trader_data: str) -> Tuple[Dict[str, List[Order]], int, str]:
+        """
+        Accept both the 2024 (result, conversions, traderData) return and the older bare result dict.
+        """
+        if output is None:
+            return {}, 0, trader_data
+        if isinstance(output, tuple):
+            orders = output[0] or {}
+            conversions = int(output[1] or 0) if len(output) >= 2 else 0
+            if len(output) >= 3:
+                trader_data = output[2] if output[2] is not None else ''
+            return orders, conversions, trader_data
+        return output, 0, trader_data
+
+
+def per_file_path(path: str, data_path: str, multiple: bool) -> str:
+    """
+    Output path for one data file of a CLI run, e.g. log.txt -> log_Day_1.txt, unchanged for a single data file.
+    """
+    if not multiple:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_{os.path.splitext(os.path.basename(data_path))[0]}{ext}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay price-level CSVs through a Trader.')
+    parser.add_argument('strategy', help='Strategy file containing a Trader class')
+    parser.add_argument('data', nargs='+', help='Price CSVs, each is replayed as an independent run')
+    parser.add_argument('--verbose', action='store_true', help="Show the Trader's prints")
+    parser.add_argument('--log-file', default=None, help="Write the Trader's prints to this file, one per data file when several are given")
+    parser.add_argument('--no-cache', action='store_true', help='Parse the CSVs directly instead of using the .npy cache')
+    parser.add_argument('--eager', action='store_true', help='Build every OrderDepth up front instead of on first access')
+    parser.add_argument('--profile', action='store_true', help='Print p50/p99/max latency per Trader section')
+    parser.add_argument('--max-state-bytes', type=int, default=None, help='Fail when traderData grows past this many bytes')
+    parser.add_argument('--max-codec-ms', type=float, default=None, help='Fail when traderData decode + encode takes longer than this')
+    parser.add_argument('--state-curve', default=None, help='Write the traderData growth curve to this CSV (and a PNG if matplotlib is installed)')
+    parser.add_argument('--observations', nargs='+', default=None, help='ORCHIDS conversion observation CSVs, one per data file or one for all')
+    args = parser.parse_args()
+    if args.observations and len(args.observations) not in (1, len(args.data)):
+        parser.error('give one observations file, or one per data file')
+    if args.verbose and args.log_file:
+        parser.error('--verbose and --log-file both take the Trader\'s prints, use one')
+    if args.observations and args.no_cache:
+        parser.error('--observations needs the columnar book, drop --no-cache')
+
+    trader_cls = load_trader(args.strategy)
+    multiple = len(args.data) > 1
+    for i, path in enumerate(args.data):
+        start = time.perf_counter()
+        if args.no_cache:
+            ticks = load_day_csv(path)
+        else:
+            book = load_book(path)
+            if args.observations:
+                try:
+                    book.join_observations(load_observations(args.observations[i % len(args.observations)]))
+                except ValueError as e:
+                    parser.error(str(e))
+            ticks = ticks_from_book(book) if args.eager else BookTicks(book)
+        # Decoding again on every tick costs as much as the Trader's own decode, only pay for it when it is checked
+        monitor = StateMonitor(args.max_state_bytes, args.max_codec_ms, jsonpickle.decode if args.max_codec_ms is not None else None)
+        try:
+            log_file = per_file_path(args.log_file, path, multiple) if args.log_file else None
+            result = Backtester(trader_cls, ticks, verbose=args.verbose, state_monitor=monitor, log_file=log_file).run()
+        except StateLimitExceeded as e:
+            print(f"=== {path} FAILED: {e}")
+            print(monitor.summary())
+            sys.exit(1)
+        finally:
+            if args.state_curve:
+                monitor.save(per_file_path(args.state_curve, path, multiple), f"{args.strategy} {os.path.splitext(os.path.basename(path))[0]}")
+        print(f"=== {path} ({len(ticks)} ticks, {time.perf_counter() - start:.2f}s)")
+        print(result.summary())
+        print(monitor.summary())
+        if args.profile and result.latency is not None:
+            print(result.latency.to_string(index=False, float_format=lambda x: f'{x:.3f}'))
+
+
+if __name__ == '__main__':
+    main()
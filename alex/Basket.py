@@ -0,0 +1,321 @@
+from typing import Dict, List, Mapping, Tuple
+from datamodel import Order, OrderDepth
+from RollingStats import RollingStats
+import math
+
+# Author: Alex Morrow
+# Streaming statistics of the GIFT_BASKET spread for the basket arbitrage in Round3/BasketOfficial. Replaces the
+# ever-growing self.spread list and the np.mean/np.std over self.spread[-48:] each tick:
+#
+#   self.spread = BasketSpread()
+#   ...
+#   self.spread.push(mids)                  # mids[product] for the basket and its components
+#   lower, mean, upper = self.spread.bands(3.1)
+#   if self.spread.ready and self.spread.last > upper:
+#       size = size_basket(state.order_depths, SELL_BASKET, mean, state.position, self.position_limits)
+#       result.update(size.orders())
+#
+# Apart from datamodel it only uses the standard library, so it can be pasted into a submission file.
+
+BASKET = 'GIFT_BASKET'
+BASKET_WEIGHTS = {'CHOCOLATE': 4, 'STRAWBERRIES': 6, 'ROSES': 1}
+SELL_BASKET = -1    # Sell baskets into the bids, buy components from the asks (spread above the upper band)
+BUY_BASKET = 1      # Buy baskets from the asks, sell components into the bids (spread below the lower band)
+
+
+class BasketSpread:
+    """
+    Basket mid minus the weighted component mids, with O(1) rolling mean, std and z-score over the last `window`
+    spreads.
+
+    Defaults match Round3: 4 CHOCOLATE + 6 STRAWBERRIES + 1 ROSES, a 48 tick window and ddof=0 like np.std, so
+    mean/std equal np.mean(self.spread[-48:]) and np.std(self.spread[-48:]).
+
+    Args:
+        weights (Dict[str, float], optional): Component -> units per basket.
+        window (int, optional): Number of spreads in the window.
+        basket (str, optional): Basket product.
+        ddof (int, optional): Delta degrees of freedom for std.
+        premium (float, optional): Constant subtracted from the spread, e.g. 375 for PICNIC_BASKET.
+        basket_units (int, optional): Baskets per unit, for ratios that are not whole numbers of components per
+            basket (1.875 COCONUTS per PINA_COLADAS is 8 PINA_COLADAS against 15 COCONUTS).
+    """
+
+    def __init__(self, weights: Dict[str, float] = None, window: int = 48, basket: str = BASKET, ddof: int = 0,
+                 premium: float = 0.0, basket_units: int = 1):
+        self.weights = dict(weights if weights is not None else BASKET_WEIGHTS)
+        self.basket = basket
+        self.premium = premium
+        self.basket_units = basket_units
+        self.stats = RollingStats(window, ddof)
+
+    def spread(self, mids: Mapping[str, float]) -> float:
+        """
+        Spread for one set of mid prices, without recording it.
+        """
+        components = sum(weight * mids[product] for product, weight in self.weights.items())
+        return self.basket_units * mids[self.basket] - components - self.premium
+
+    def push(self, mids: Mapping[str, float]) -> float:
+        """
+        Record the spread of this tick's mids and return it.
+        """
+        value = self.spread(mids)
+        self.stats.push(value)
+        return value
+
+    @property
+    def ready(self) -> bool:
+        """
+        True once `window` spreads have been pushed, the point where Round3 starts trading.
+        """
+        return self.stats.ready
+
+    @property
+    def last(self) -> float:
+        return self.stats.last()
+
+    @property
+    def mean(self) -> float:
+        return self.stats.mean if self.stats.count else math.nan
+
+    @property
+    def std(self) -> float:
+        return self.stats.std
+
+    @property
+    def z(self) -> float:
+        """
+        (last spread - mean) / std, NaN before the first spread or while the window is flat.
+        """
+        std = self.stats.std
+        if not std or math.isnan(std):
+            return math.nan
+        return (self.stats.last() - self.stats.mean) / std
+
+    def bands(self, k: float) -> Tuple[float, float, float]:
+        """
+        Returns:
+            Tuple[float, float, float]: (mean - k * std, mean, mean + k * std).
+        """
+        return self.stats.bollinger(k)
+
+    def __getstate__(self):
+        # Weights and basket are configuration, only the window of spreads is state
+        return {'w': self.weights, 'b': self.basket, 'p': self.premium, 'u': self.basket_units, 's': self.stats.__getstate__()}
+
+    def __setstate__(self, state):
+        self.weights = state['w']
+        self.basket = state['b']
+        self.premium = state.get('p', 0.0)
+        self.basket_units = state.get('u', 1)
+        self.stats = RollingStats.__new__(RollingStats)
+        self.stats.__setstate__(state['s'])
+
+
+class BasketSize:
+    """
+    Output of size_basket.
+
+    Attributes:
+        units (int): Baskets to trade.
+        edge (float): Total edge of those units against the threshold.
+        quantities (Dict[str, int]): Signed quantity per product, positive buys.
+        limit_prices (Dict[str, int]): Worst book level each product has to reach, the price to send the order at.
+        marginal (List[float]): Edge of each unit taken, non-increasing.
+    """
+
+    def __init__(self, units: int, edge: float, quantities: Dict[str, int], limit_prices: Dict[str, int], marginal: List[float]):
+        self.units = units
+        self.edge = edge
+        self.quantities = quantities
+        self.limit_prices = limit_prices
+        self.marginal = marginal
+
+    def orders(self) -> Dict[str, List[Order]]:
+        """
+        One order per product at its worst level, which fills level by level at the book prices.
+        """
+        return {product: [Order(product, self.limit_prices[product], quantity)]
+                for product, quantity in self.quantities.items() if quantity != 0}
+
+    def __repr__(self) -> str:
+        return f"BasketSize(units={self.units}, edge={self.edge:.1f}, quantities={self.quantities})"
+
+
+class _LadderWalk:
+    """
+    Consumes one side of a book level by level, returning the cost of each next chunk.
+    """
+
+    __slots__ = ('levels', 'index', 'left', 'last_price')
+
+    def __init__(self, ladder: Mapping[int, int]):
+        self.levels = [(price, abs(volume)) for price, volume in ladder.items()]
+        self.index = 0
+        self.left = self.levels[0][1] if self.levels else 0
+        self.last_price = None
+
+    def available(self) -> int:
+        return self.left + sum(volume for _, volume in self.levels[self.index + 1:])
+
+    def take(self, quantity: int) -> float:
+        """
+        Notional of the next `quantity` units, assuming available() >= quantity.
+        """
+        notional = 0.0
+        while quantity > 0:
+            if self.left == 0:
+                self.index += 1
+                self.left = self.levels[self.index][1]
+                continue
+            price = self.levels[self.index][0]
+            step = min(quantity, self.left)
+            notional += price * step
+            self.left -= step
+            quantity -= step
+            self.last_price = price
+        return notional
+
+
+def size_basket(depths: Mapping[str, OrderDepth], side: int, threshold: float, positions: Mapping[str, int],
+                limits: Mapping[str, int], weights: Dict[str, float] = None, basket: str = BASKET,
+                premium: float = 0.0, basket_units: int = 1, max_units: int = None) -> BasketSize:
+    """
+    Profit-maximising number of basket units to trade across all book levels.
+
+    Unit u is executed at the book levels left after units 1..u-1: for SELL_BASKET its executed spread is the basket
+    bid it sells at minus the asks its components are bought at (minus premium, as in BasketSpread), and its
+    marginal edge is that spread minus threshold (e.g. the spread mean, or the upper band to only take units still outside it). BUY_BASKET mirrors
+    this with threshold minus (basket ask - component bids). Walking worse levels can only shrink the executed
+    spread, so marginal edge is non-increasing and taking units until it stops being positive, within the depth of
+    every leg and every position limit, is optimal.
+
+    Args:
+        depths (Mapping[str, OrderDepth]): state.order_depths.
+        side (int): SELL_BASKET or BUY_BASKET.
+        threshold (float): Spread level a unit has to beat.
+        positions (Mapping[str, int]): Current positions, missing products count as flat.
+        limits (Mapping[str, int]): Position limits per product.
+        weights (Dict[str, float], optional): Component units per basket. Defaults to BASKET_WEIGHTS.
+        basket (str, optional): Basket product.
+        premium (float, optional): Constant subtracted from every unit's executed spread.
+        basket_units (int, optional): Baskets per unit.
+        max_units (int, optional): Further cap on units, e.g. the units open when closing a position.
+
+    Returns:
+        BasketSize: units == 0 when there is no positive edge, a leg is empty or a limit is reached.
+    """
+    weights = weights if weights is not None else BASKET_WEIGHTS
+    legs = {basket: basket_units}
+    legs.update(weights)
+    # Basket direction is `side`, components go the other way
+    direction = {product: (side if product == basket else -side) for product in legs}
+    walks = {}
+    for product, units in legs.items():
+        depth = depths.get(product)
+        if depth is None:
+            return BasketSize(0, 0.0, {product: 0 for product in legs}, {}, [])
+        walks[product] = _LadderWalk(depth.ask_ladder if direction[product] > 0 else depth.bid_ladder)
+        position = positions.get(product, 0)
+        room = limits[product] - position if direction[product] > 0 else limits[product] + position
+        cap = min(walks[product].available(), max(room, 0)) // units
+        max_units = cap if max_units is None else min(max_units, cap)
+    max_units = max(max_units, 0)
+
+    marginal = []
+    limit_prices = {}
+    for _ in range(max_units):
+        # Executed spread of this unit, basket minus components
+        spread = 0.0
+        for product, units in legs.items():
+            notional = walks[product].take(units)
+            spread += notional if product == basket else -notional
+        spread -= premium
+        edge = (spread - threshold) if side == SELL_BASKET else (threshold - spread)
+        if edge <= 0:
+            break
+        marginal.append(edge)
+        limit_prices = {product: walk.last_price for product, walk in walks.items()}
+
+    units = len(marginal)
+    quantities = {product: direction[product] * legs[product] * units for product in legs}
+    return BasketSize(units, sum(marginal), quantities, limit_prices, marginal)
+
+
+def check_sizing(ticks: int = 2000, seed: int = 0) -> Tuple[int, float, float]:
+    """
+    Compare size_basket with brute force and with level-1 sizing on a synthetic basket day, both sides each tick,
+    with the spread mean as threshold.
+
+    Returns:
+        Tuple[int, float, float]: (ticks where size_basket missed the brute force optimum, total edge of
+        size_basket, total edge of level-1 sizing).
+    """
+    import numpy as np
+    from LazyState import BookTicks
+    from Signals import synthetic_basket_day
+    limits = {BASKET: 60, 'CHOCOLATE': 250, 'STRAWBERRIES': 350, 'ROSES': 60}
+    legs = {BASKET: 1}
+    legs.update(BASKET_WEIGHTS)
+    rng = np.random.default_rng(seed)
+    spread, mismatches, solver_edge, level1_edge = BasketSpread(), 0, 0.0, 0.0
+    for tick in BookTicks(synthetic_basket_day(ticks, seed)):
+        depths = tick.order_depths()
+        spread.push({product: depths[product].mid_price for product in legs})
+        if not spread.ready:
+            continue
+        positions = {product: int(rng.integers(-limits[product], limits[product] + 1)) for product in legs}
+        for side in (SELL_BASKET, BUY_BASKET):
+            size = size_basket(depths, side, spread.mean, positions, limits)
+            solver_edge += size.edge
+
+            # Brute force: price every unit from the expanded ladders and pick the best prefix
+            unit_prices, cap = {}, None
+            for product, units in legs.items():
+                direction = side if product == BASKET else -side
+                ladder = depths[product].ask_ladder if direction > 0 else depths[product].bid_ladder
+                prices = [price for price, volume in ladder.items() for _ in range(abs(volume))]
+                room = limits[product] - positions[product] if direction > 0 else limits[product] + positions[product]
+                leg_cap = min(len(prices), max(room, 0)) // units
+                cap = leg_cap if cap is None else min(cap, leg_cap)
+                unit_prices[product] = prices
+            best, total = 0.0, 0.0
+            for u in range(cap):
+                executed = unit_prices[BASKET][u] - sum(sum(unit_prices[p][u * w:(u + 1) * w]) for p, w in BASKET_WEIGHTS.items())
+                total += (executed - spread.mean) if side == SELL_BASKET else (spread.mean - executed)
+                best = max(best, total)
+            mismatches += abs(best - size.edge) > 1e-6
+
+            # Level-1 sizing as in calculate_unit_volume: best level volumes only, same limits
+            level1 = cap
+            for product, units in legs.items():
+                depth = depths[product]
+                best_volume = depth.best_ask_volume if (side if product == BASKET else -side) > 0 else depth.best_bid_volume
+                level1 = min(level1, abs(best_volume) // units)
+            executed = unit_prices[BASKET][0] - sum(w * unit_prices[p][0] for p, w in BASKET_WEIGHTS.items()) if level1 else 0.0
+            edge = (executed - spread.mean) if side == SELL_BASKET else (spread.mean - executed)
+            level1_edge += level1 * edge if edge > 0 else 0.0
+    return mismatches, solver_edge, level1_edge
+
+
+if __name__ == '__main__':
+    import jsonpickle
+    import numpy as np
+    rng = np.random.default_rng(0)
+    spread, history, worst = BasketSpread(), [], 0.0
+    for _ in range(10000):
+        mids = {'CHOCOLATE': 8000 + rng.integers(-20, 20) / 2, 'STRAWBERRIES': 4000 + rng.integers(-10, 10) / 2,
+                'ROSES': 14500 + rng.integers(-40, 40) / 2, 'GIFT_BASKET': 70500 + rng.integers(-200, 200) / 2}
+        history.append(mids['GIFT_BASKET'] - 4 * mids['CHOCOLATE'] - 6 * mids['STRAWBERRIES'] - mids['ROSES'])
+        spread.push(mids)
+        if len(history) >= 48:
+            worst = max(worst, abs(spread.mean - np.mean(history[-48:])), abs(spread.std - np.std(history[-48:])))
+    restored = jsonpickle.decode(jsonpickle.encode(spread))
+    print(f"max abs difference vs np.mean/np.std over spread[-48:]: {worst:.3e}")
+    print(f"state: {len(jsonpickle.encode(spread))} bytes vs {len(jsonpickle.encode(history))} for the spread list")
+    assert worst < 1e-6 and abs(restored.z - spread.z) < 1e-9
+
+    mismatches, solver_edge, level1_edge = check_sizing()
+    print(f"size_basket: {mismatches} ticks off the brute force optimum, edge {solver_edge:.0f} vs {level1_edge:.0f} with level-1 sizing")
+    assert mismatches == 0
@@ -0,0 +1,467 @@
+from typing import Dict, List, Tuple
+from datamodel import ConversionObservation, Order, OrderDepth
+from OrderBookStore import OBSERVATION_COLUMNS, ProductBook
+import numpy as np
+import pandas as pd
+
+# Author: Alex Morrow
+# ORCHIDS local-vs-island arbitrage. Conversions trade with the South archipelago:
+#
+#   import (buy) 1 unit:  askPrice + transportFees + importTariff
+#   export (sell) 1 unit: bidPrice - transportFees - exportTariff
+#
+# and a long position costs STORAGE_COST per unit per tick to hold. Every tick the planner decides, unit by unit,
+# how the position it holds leaves: converted now, unwound on the local book when a level beats conversion, or held
+# when the island is expected to pay better next tick after storage. Whatever local volume is left is arbitraged
+# against the island, buying asks below next tick's export price (after a tick of storage) and selling bids above
+# next tick's import price. plan_tick does this for one TradingState, plan_day for every row of a day at once, and
+# backtest_plan replays a day, carrying the position from tick to tick, and scores it.
+
+PRODUCT = 'ORCHIDS'
+LIMIT = 100
+STORAGE_COST = 0.1
+
+
+def export_price(bid_price, transport_fees, export_tariff):
+    """
+    What the island pays per unit we export. Works on scalars and arrays.
+    """
+    return bid_price - transport_fees - export_tariff
+
+
+def import_price(ask_price, transport_fees, import_tariff):
+    """
+    What the island charges per unit we import. Works on scalars and arrays.
+    """
+    return ask_price + transport_fees + import_tariff
+
+
+def _take(level_volume: np.ndarray, edge: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    """
+    Units taken from each level (last axis): every level with positive edge, best first, up to capacity units.
+    """
+    available = np.where((edge > 0) & (level_volume > 0), level_volume, 0)
+    before = np.cumsum(available, axis=-1) - available
+    return np.clip(np.asarray(capacity)[..., None] - before, 0, available)
+
+
+def _worst(level_price: np.ndarray, take: np.ndarray) -> np.ndarray:
+    """
+    Price of the last level taken per row, NaN where nothing is taken.
+    """
+    last_level = np.where(take > 0, np.arange(take.shape[1]), -1).max(axis=1)
+    return np.where(last_level >= 0, np.take_along_axis(level_price, np.maximum(last_level, 0)[:, None], axis=1)[:, 0], np.nan)
+
+
+def take_levels(level_price: np.ndarray, level_volume: np.ndarray, edge: np.ndarray, capacity: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Take every level with positive edge, best first, up to capacity units per row.
+
+    Args:
+        level_price, level_volume (np.ndarray): (T, L) one side of the book, best level first, volumes positive.
+        edge (np.ndarray): (T, L) profit per unit of each level.
+        capacity (np.ndarray): (T,) units allowed per row.
+
+    Returns:
+        (quantity, notional, worst price, total edge) per row, worst price NaN where nothing is taken.
+    """
+    take = _take(level_volume, edge, capacity)
+    return take.sum(axis=1), (take * level_price).sum(axis=1), _worst(level_price, take), (take * edge).sum(axis=1)
+
+
+def _walk(level_volume: np.ndarray, first_edge: np.ndarray, first_units: np.ndarray, then_edge: np.ndarray,
+          capacity: np.ndarray, min_edge: float) -> Tuple[np.ndarray, float]:
+    """
+    Take levels at first_edge for up to first_units units, then at then_edge once those are all taken, up to
+    capacity in total. Returns the units taken per level and their edge.
+    """
+    first = _take(level_volume, first_edge - min_edge, np.minimum(first_units, capacity))
+    taken = first.sum(axis=-1)
+    then = _take(level_volume - first, then_edge - min_edge, np.where(taken >= first_units, capacity - taken, 0))
+    edge = (first * np.where(first > 0, first_edge, 0) + then * np.where(then > 0, then_edge, 0)).sum(axis=-1)
+    return first + then, edge
+
+
+def plan_levels(bid_price: np.ndarray, bid_volume: np.ndarray, ask_price: np.ndarray, ask_volume: np.ndarray,
+                export_px: np.ndarray, import_px: np.ndarray, position=0, next_export: np.ndarray = None,
+                next_import: np.ndarray = None, limit: int = LIMIT, storage: float = STORAGE_COST,
+                min_edge: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Conversions and local orders for every row at once, each row starting from its own position.
+
+    Whatever position is left at the end of the tick is worth next tick's island price: next_export - storage per
+    long unit, -next_import per short unit. Against that, converting a held unit now gains export_px -
+    (next_export - storage) for a long or next_import - import_px for a short, a local bid b gains b minus the value
+    of the unit it takes off the position and an ask a gains the value of the unit it adds minus a. So the bids
+    first close the long (against next_export - storage) and then open shorts (against next_import), and the asks
+    the same way round. Units that are not converted stay on the position and use up room under the limit that the
+    local orders could have used, so every possible conversion quantity is planned and the best one kept. Local
+    levels are only taken while their edge is above min_edge.
+
+    Args:
+        bid_price, bid_volume, ask_price, ask_volume (np.ndarray): (T, L) local book, best level first.
+        export_px, import_px (np.ndarray): (T,) island prices this tick, after fees and tariffs. NaN rows convert
+            and trade nothing.
+        position (np.ndarray, optional): (T,) position held coming into each row. Defaults to flat.
+        next_export, next_import (np.ndarray, optional): (T,) expected island prices next tick, e.g. from a model of
+            sunlight and humidity. Default to this tick's, in which case long inventory is never held on purpose.
+
+    Returns:
+        Dict[str, np.ndarray]: conversions (signed, positive imports), buy_quantity, buy_price (worst ask to send the
+        order at), sell_quantity, sell_price, held (signed part of the incoming position neither converted nor closed
+        on the book) and expected_edge (gain over keeping the position and not trading), each (T,).
+    """
+    rows = len(bid_price)
+    export_px = np.asarray(export_px, dtype=np.float64)
+    import_px = np.asarray(import_px, dtype=np.float64)
+    next_export = export_px if next_export is None else np.asarray(next_export, dtype=np.float64)
+    next_import = import_px if next_import is None else np.asarray(next_import, dtype=np.float64)
+    position = np.broadcast_to(np.asarray(position, dtype=np.int64), (rows,))
+    hold_long = next_export - storage
+
+    # Candidate conversion quantities on a second axis, (T, K)
+    size = np.abs(position)
+    units = np.arange(size.max(initial=0) + 1)[None, :]
+    direction = np.sign(position)[:, None]
+    after = position[:, None] - direction * units
+    convert_gain = units * np.where(position > 0, export_px - hold_long, next_import - import_px)[:, None]
+
+    # (T, K, L): the book broadcast against every candidate
+    bid_valid, ask_valid = (bid_volume > 0)[:, None, :], (ask_volume > 0)[:, None, :]
+    bids, asks = bid_price[:, None, :], ask_price[:, None, :]
+    sell, sell_gain = _walk(bid_volume[:, None, :], np.where(bid_valid, bids - hold_long[:, None, None], -np.inf),
+                            np.maximum(after, 0), np.where(bid_valid, bids - next_import[:, None, None], -np.inf),
+                            limit + after, min_edge)
+    buy, buy_gain = _walk(ask_volume[:, None, :], np.where(ask_valid, next_import[:, None, None] - asks, -np.inf),
+                          np.maximum(-after, 0), np.where(ask_valid, hold_long[:, None, None] - asks, -np.inf),
+                          limit - after, min_edge)
+    value = convert_gain + sell_gain + buy_gain
+    value = np.where(np.isnan(value), np.where(units == 0, 0.0, -np.inf), value)
+    value = np.where(units <= size[:, None], value, -np.inf)
+
+    # Most conversion among equally good quantities
+    best = value.shape[1] - 1 - np.argmax(value[:, ::-1], axis=1)
+    pick = best[:, None, None]
+    sell = np.take_along_axis(sell, pick, axis=1)[:, 0, :]
+    buy = np.take_along_axis(buy, pick, axis=1)[:, 0, :]
+    converted = best * -np.sign(position)
+    remaining = position + converted
+    closed = np.where(remaining > 0, np.minimum(sell.sum(axis=1), remaining), np.minimum(buy.sum(axis=1), -remaining))
+    return {'conversions': converted, 'buy_quantity': buy.sum(axis=1), 'buy_price': _worst(ask_price, buy),
+            'sell_quantity': sell.sum(axis=1), 'sell_price': _worst(bid_price, sell),
+            'held': remaining - np.sign(remaining) * closed,
+            'expected_edge': np.take_along_axis(value, best[:, None], axis=1)[:, 0]}
+
+
+class ConversionPlan:
+    """
+    One tick of the planner's output.
+
+    Attributes:
+        conversions (int): Value to return from run() as conversions, the part of the position converted this tick.
+        buy_quantity, sell_quantity (int): Unsigned local quantities.
+        buy_price, sell_price (int): Worst level to send each order at, None when not trading that side.
+        held (int): Signed part of the position kept for a later tick.
+        expected_edge (float): Edge of the local orders over converting or holding, at the observed island prices.
+    """
+
+    def __init__(self, conversions: int, buy_quantity: int, buy_price, sell_quantity: int, sell_price,
+                 expected_edge: float, held: int = 0):
+        self.conversions = conversions
+        self.buy_quantity = buy_quantity
+        self.buy_price = buy_price
+        self.sell_quantity = sell_quantity
+        self.sell_price = sell_price
+        self.expected_edge = expected_edge
+        self.held = held
+
+    def orders(self, product: str = PRODUCT) -> List[Order]:
+        orders = []
+        if self.buy_quantity:
+            orders.append(Order(product, self.buy_price, self.buy_quantity))
+        if self.sell_quantity:
+            orders.append(Order(product, self.sell_price, -self.sell_quantity))
+        return orders
+
+    def __repr__(self) -> str:
+        return (f"ConversionPlan(conversions={self.conversions}, buy={self.buy_quantity}@{self.buy_price}, "
+                f"sell={self.sell_quantity}@{self.sell_price}, held={self.held}, edge={self.expected_edge:.1f})")
+
+
+def plan_tick(depth: OrderDepth, observation: ConversionObservation, position: int, limit: int = LIMIT,
+              storage: float = STORAGE_COST, min_edge: float = 0.0, forecast: ConversionObservation = None) -> ConversionPlan:
+    """
+    Plan this tick's conversions and local orders, for use inside run():
+
+        plan = plan_tick(state.order_depths['ORCHIDS'], state.observations.conversionObservations['ORCHIDS'],
+                         state.position.get('ORCHIDS', 0))
+        result['ORCHIDS'] = plan.orders()
+        return result, plan.conversions, traderData
+
+    forecast is the expected observation next tick, when the Trader has one; without it the island prices are taken
+    to stay where they are.
+    """
+    bids = list(depth.bid_ladder.items())
+    asks = [(price, -volume) for price, volume in depth.ask_ladder.items()]
+    width = max(len(bids), len(asks), 1)
+
+    def side(levels):
+        price = np.zeros((1, width), dtype=np.int64)
+        volume = np.zeros((1, width), dtype=np.int64)
+        for i, (p, v) in enumerate(levels):
+            price[0, i], volume[0, i] = p, v
+        return price, volume
+
+    def island(o):
+        return (np.array([export_price(o.bidPrice, o.transportFees, o.exportTariff)]),
+                np.array([import_price(o.askPrice, o.transportFees, o.importTariff)]))
+
+    bid_price, bid_volume = side(bids)
+    ask_price, ask_volume = side(asks)
+    export_px, import_px = island(observation)
+    next_export, next_import = island(forecast) if forecast is not None else (None, None)
+    plan = plan_levels(bid_price, bid_volume, ask_price, ask_volume, export_px, import_px, position, next_export,
+                       next_import, limit, storage, min_edge)
+    buy_quantity, sell_quantity = int(plan['buy_quantity'][0]), int(plan['sell_quantity'][0])
+    return ConversionPlan(int(plan['conversions'][0]), buy_quantity, int(plan['buy_price'][0]) if buy_quantity else None,
+                          sell_quantity, int(plan['sell_price'][0]) if sell_quantity else None,
+                          float(plan['expected_edge'][0]), int(plan['held'][0]))
+
+
+def align_observations(book: ProductBook, observations: pd.DataFrame) -> pd.DataFrame:
+    """
+    Observation rows matching each book row, by (day, timestamp) when observations has a day column, else by
+    timestamp. Rows with no observation are NaN.
+    """
+    keys = ['day', 'timestamp'] if 'day' in observations.columns else ['timestamp']
+    rows = pd.DataFrame({'day': np.asarray(book.day), 'timestamp': np.asarray(book.timestamp)})
+    return rows.merge(observations, on=keys, how='left')
+
+
+def _island_prices(book: ProductBook, observations: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Export and import price per book row, NaN for rows with no observation.
+    """
+    obs = align_observations(book, observations)
+    return (export_price(obs['bidPrice'], obs['transportFees'], obs['exportTariff']).to_numpy(),
+            import_price(obs['askPrice'], obs['transportFees'], obs['importTariff']).to_numpy())
+
+
+def plan_day(book: ProductBook, observations: pd.DataFrame, position=0, forecast: pd.DataFrame = None,
+             limit: int = LIMIT, storage: float = STORAGE_COST, min_edge: float = 0.0) -> pd.DataFrame:
+    """
+    plan_levels over every row of a product's book, with island prices from observations (columns as in
+    OBSERVATION_COLUMNS, e.g. the round's observations CSV).
+
+    Args:
+        position (optional): Position coming into each row, a scalar or one per row. Defaults to flat.
+        forecast (pd.DataFrame, optional): Expected island prices for the next row, in the same columns and keyed
+            by the row the forecast is made at.
+
+    Returns:
+        pd.DataFrame: timestamp, export_price, import_price and the plan_levels columns per book row. Rows without an
+        observation convert and trade nothing.
+    """
+    export_px, import_px = _island_prices(book, observations)
+    next_export, next_import = _island_prices(book, forecast) if forecast is not None else (None, None)
+    with np.errstate(invalid='ignore'):
+        plan = plan_levels(np.asarray(book.bid_price), np.asarray(book.bid_volume), np.asarray(book.ask_price),
+                           np.asarray(book.ask_volume), export_px, import_px, position, next_export, next_import,
+                           limit, storage, min_edge)
+    frame = pd.DataFrame({'day': np.asarray(book.day), 'timestamp': np.asarray(book.timestamp),
+                          'export_price': export_px, 'import_price': import_px})
+    for name, values in plan.items():
+        frame[name] = values
+    return frame
+
+
+def backtest_plan(book: ProductBook, observations: pd.DataFrame, forecast: pd.DataFrame = None, limit: int = LIMIT,
+                  storage: float = STORAGE_COST, min_edge: float = 0.0) -> pd.DataFrame:
+    """
+    Replay the planner over a day the way the Backtester runs a Trader: each row pays storage on the long position
+    it comes in with, converts what the plan converts at that row's island prices, then fills the local orders on
+    the book. The position carries over to the next row, so held inventory and partial conversions are scored.
+
+    Rows depend on each other only through the position, so the whole day is planned at once from a guess of the
+    incoming positions, then re-planned from the positions that guess leads to until they stop changing. Row t is
+    exact after t passes and the fixed point is the tick-by-tick replay; in practice it takes a handful of passes.
+
+    Args:
+        book (ProductBook): Product book, e.g. load_book('Round2Day1.csv').products['ORCHIDS'].
+        observations (pd.DataFrame): Actual island prices and fees, used for planning and for the conversions.
+        forecast (pd.DataFrame, optional): Expected next-row island prices to plan with, see plan_day.
+
+    Returns:
+        pd.DataFrame: Per row fills, conversions, cash flows, inventory held on purpose, position and cumulative pnl
+        (open position marked to mid).
+    """
+    export_px, import_px = _island_prices(book, observations)
+    next_export, next_import = _island_prices(book, forecast) if forecast is not None else (None, None)
+    bid_price, bid_volume = np.asarray(book.bid_price), np.asarray(book.bid_volume)
+    ask_price, ask_volume = np.asarray(book.ask_price), np.asarray(book.ask_volume)
+
+    incoming = np.zeros(len(book), dtype=np.int64)
+    with np.errstate(invalid='ignore'):
+        for _ in range(len(book) + 1):
+            plan = plan_levels(bid_price, bid_volume, ask_price, ask_volume, export_px, import_px, incoming,
+                               next_export, next_import, limit, storage, min_edge)
+            position = incoming + plan['conversions'] + plan['buy_quantity'] - plan['sell_quantity']
+            following = np.concatenate([[0], position[:-1]])
+            if np.array_equal(following, incoming):
+                break
+            incoming = following
+
+    # Orders at the worst planned level take every better level too, which is exactly the planned quantities
+    ones = np.ones(ask_price.shape)
+    _, buy_notional, _, _ = take_levels(ask_price, ask_volume, ones, plan['buy_quantity'])
+    _, sell_notional, _, _ = take_levels(bid_price, bid_volume, ones, plan['sell_quantity'])
+    converted = plan['conversions']
+    conversion_cash = np.where(converted > 0, -converted * import_px, np.where(converted < 0, -converted * export_px, 0.0))
+    storage_cost = storage * np.maximum(incoming, 0)
+
+    cash = sell_notional - buy_notional + conversion_cash - storage_cost
+    # The file's mid_price, as the Backtester marks with, since empty levels are stored as price 0
+    mid = np.asarray(book.mid_price, dtype=np.float64)
+    frame = pd.DataFrame({
+        'day': np.asarray(book.day), 'timestamp': np.asarray(book.timestamp),
+        'bought': plan['buy_quantity'], 'sold': plan['sell_quantity'], 'conversions': converted,
+        'fill_cash': sell_notional - buy_notional, 'conversion_cash': conversion_cash, 'storage': storage_cost,
+        'expected_edge': plan['expected_edge'], 'held': plan['held'], 'position': position,
+    })
+    frame['pnl'] = np.cumsum(cash) + position * mid
+    return frame
+
+
+def check_planner(trials: int = 500, limit: int = 10, seed: int = 0) -> Tuple[int, float]:
+    """
+    Compare plan_levels with a brute force over every conversion and local buy/sell quantity the exchange would
+    accept, on random single ticks with random positions and forecasts. Both are scored the same way: conversion
+    and fill cash now, plus the end position valued at next tick's island price (after storage for a long).
+
+    Returns:
+        Tuple[int, float]: Ticks where the plan is worse than the best, and the largest shortfall.
+    """
+    rng = np.random.default_rng(seed)
+    mismatches, worst = 0, 0.0
+    for _ in range(trials):
+        best_bid = int(rng.integers(990, 1010))
+        bid_price = (best_bid - np.arange(3) * rng.integers(1, 3))[None, :]
+        ask_price = (best_bid + rng.integers(1, 4) + np.arange(3) * rng.integers(1, 3))[None, :]
+        bid_volume = rng.integers(0, 6, (1, 3))
+        ask_volume = rng.integers(0, 6, (1, 3))
+        # Island prices around the book with import dearer than export, now and next tick
+        centre = best_bid + rng.normal(1, 3, 2)
+        half = rng.uniform(0.5, 4, 2)
+        export_px, import_px = np.array([centre[0] - half[0]]), np.array([centre[0] + half[0]])
+        next_export, next_import = np.array([centre[1] - half[1]]), np.array([centre[1] + half[1]])
+        position = int(rng.integers(-limit, limit + 1))
+        storage = float(rng.choice([0.0, STORAGE_COST, 1.0]))
+
+        def value(converted, sold, bought):
+            bids = np.repeat(bid_price[0], bid_volume[0])
+            asks = np.repeat(ask_price[0], ask_volume[0])
+            end = position + converted + bought - sold
+            cash = bids[:sold].sum() - asks[:bought].sum()
+            cash -= converted * (import_px[0] if converted > 0 else export_px[0])
+            return cash + (end * (next_export[0] - storage) if end > 0 else end * next_import[0])
+
+        best = -np.inf
+        conversions = range(0, -position + 1) if position < 0 else range(-position, 1)
+        for converted in conversions:
+            after = position + converted
+            for sold in range(0, min(int(bid_volume.sum()), limit + after) + 1):
+                for bought in range(0, min(int(ask_volume.sum()), limit - after) + 1):
+                    best = max(best, value(converted, sold, bought))
+
+        plan = plan_levels(bid_price, bid_volume, ask_price, ask_volume, export_px, import_px, position, next_export,
+                           next_import, limit, storage)
+        converted = int(plan['conversions'][0])
+        sold, bought = int(plan['sell_quantity'][0]), int(plan['buy_quantity'][0])
+        after = position + converted
+        assert after - sold >= -limit and after + bought <= limit and converted * position <= 0
+        shortfall = best - value(converted, sold, bought)
+        if shortfall > 1e-9:
+            mismatches += 1
+            worst = max(worst, shortfall)
+    return mismatches, worst
+
+
+def synthetic_observations(book: ProductBook, seed: int = 0) -> pd.DataFrame:
+    """
+    Island prices around the local mid with round 2 like fees, for when the round's observations file is not at
+    hand. Only for exercising the planner, the edges it finds are not representative.
+    """
+    rng = np.random.default_rng(seed)
+    rows = len(book)
+    mid = np.asarray(book.mid_price, dtype=np.float64)
+    island_mid = mid + np.cumsum(rng.normal(0, 0.3, rows)) * 0.1 + 1.0
+    return pd.DataFrame({
+        'day': np.asarray(book.day), 'timestamp': np.asarray(book.timestamp),
+        'bidPrice': island_mid - 1.0, 'askPrice': island_mid + 1.0,
+        'transportFees': np.round(0.9 + rng.normal(0, 0.02, rows), 1),
+        'exportTariff': np.full(rows, 9.5), 'importTariff': np.full(rows, -5.0),
+        'sunlight': np.full(rows, 2500.0), 'humidity': np.full(rows, 80.0),
+    })
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from OrderBookStore import COLUMNS, load_book
+    from PnLEngine import PnLEngine
+    mismatches, shortfall = check_planner()
+    print(f"plan_levels vs brute force: {mismatches} ticks worse than the best, shortfall up to {shortfall:.3f}")
+    assert mismatches == 0
+
+    path = sys.argv[1] if len(sys.argv) > 1 else 'Round2Day1.csv'
+    book = load_book(path).products[PRODUCT]
+    # Empty the ask side of every 97th row, one-sided ticks must still be marked at the file's mid_price
+    one_sided = np.arange(len(book)) % 97 == 0
+    levels = {column: np.where(one_sided[:, None], 0, getattr(book, column)) if column.startswith('ask')
+              else np.asarray(getattr(book, column)) for column in COLUMNS}
+    book = ProductBook(PRODUCT, np.asarray(book.day), np.asarray(book.timestamp), levels, np.asarray(book.mid_price))
+    observations = pd.read_csv(sys.argv[2]) if len(sys.argv) > 2 else synthetic_observations(book)
+    # A perfect forecast of the next row, to exercise holding and partial conversion
+    forecast = observations.copy()
+    forecast[OBSERVATION_COLUMNS] = observations[OBSERVATION_COLUMNS].shift(-1).ffill()
+
+    for label, fc in (('current prices', None), ('next-row forecast', forecast)):
+        start = time.perf_counter()
+        result = backtest_plan(book, observations, fc)
+        elapsed = 1000 * (time.perf_counter() - start)
+        print(f"{path} planning on {label}: {len(result)} ticks in {elapsed:.1f} ms, pnl {result['pnl'].iloc[-1]:.1f}, "
+              f"bought {result['bought'].sum()}, sold {result['sold'].sum()}, converted {result['conversions'].abs().sum()}, "
+              f"ticks holding inventory {(result['held'] != 0).sum()}")
+
+        # Same day tick by tick through plan_tick and PnLEngine, as a Trader would run it in the Backtester
+        obs = align_observations(book, observations).to_dict('records')
+        ahead = align_observations(book, fc).to_dict('records') if fc is not None else None
+        ledger, position, difference, pnl = PnLEngine(), 0, 0.0, result['pnl'].to_numpy()
+        for row in range(len(book)):
+            o = obs[row]
+            observation = ConversionObservation(*(o[name] for name in OBSERVATION_COLUMNS))
+            prediction = ConversionObservation(*(ahead[row][name] for name in OBSERVATION_COLUMNS)) if ahead else None
+            depth = OrderDepth()
+            bids, asks = book.levels(row)
+            depth.buy_orders = dict(bids)
+            depth.sell_orders = {price: -volume for price, volume in asks}
+            plan = plan_tick(depth, observation, position, forecast=prediction)
+            if position > 0:
+                ledger.charge(PRODUCT, STORAGE_COST * position)
+            if plan.conversions > 0:
+                ledger.convert(PRODUCT, plan.conversions, import_price(observation.askPrice, observation.transportFees, observation.importTariff))
+            elif plan.conversions < 0:
+                ledger.convert(PRODUCT, plan.conversions, export_price(observation.bidPrice, observation.transportFees, observation.exportTariff))
+            position += plan.conversions
+            for order in plan.orders():
+                remaining = abs(order.quantity)
+                for price, volume in (asks if order.quantity > 0 else bids):
+                    fill = min(remaining, volume)
+                    if fill and (price <= order.price if order.quantity > 0 else price >= order.price):
+                        ledger.fill(PRODUCT, price, fill if order.quantity > 0 else -fill)
+                        remaining -= fill
+                position += abs(order.quantity) - remaining if order.quantity > 0 else -(abs(order.quantity) - remaining)
+            ledger.mark({PRODUCT: float(book.mid_price[row])})
+            difference = max(difference, abs(ledger.total() - pnl[row]))
+        print(f"tick-by-tick plan_tick + PnLEngine pnl {ledger.total():.1f}, difference {difference:.2e}")
+        assert difference < 1e-6
@@ -0,0 +1,243 @@
+from typing import Dict, Iterable, Mapping
+from datamodel import Trade, TradingState
+import numpy as np
+import pandas as pd
+
+# Author: Alex Morrow
+# Who is buying and selling what, from the named market trades. Replaces StanfordCardinals' person_position /
+# person_actvalof_position dicts and their per-tick decay loop with two trader x product matrices. A trade only
+# touches its buyer's and seller's rows, and decay is applied lazily from the timestamp delta when a row is read or
+# written, so a tick costs O(trades) however many traders have been seen:
+#
+#   self.flow = CounterpartyFlow(STANFORD_DECAY)
+#   ...
+#   self.flow.update(state)
+#   if self.flow.direction('Olivia', 'UKULELE', state.timestamp) > 0:
+#       ...  # Olivia bought recently, follow her
+
+# StanfordCardinals' decay per tick: Olivia's signal lingers, Pablo's fades fast, Camilla's lasts one tick
+STANFORD_DECAY = {'Olivia': 0.995, 'Pablo': 0.8, 'Camilla': 0.0}
+TICK = 100
+
+
+class CounterpartyFlow:
+    """
+    Decayed signal and raw net position of every named trader in every product.
+
+    The signal is the same as StanfordCardinals' person_position: with mark set, each trade overwrites the buyer's
+    signal with +mark and the seller's with -mark; with mark None the signed quantities accumulate instead. Either
+    way it is multiplied by the trader's decay once per tick since it was set. The position is the undecayed sum of
+    signed quantities (person_actvalof_position).
+
+    Args:
+        decay (Mapping[str, float], optional): Trader -> signal decay per tick.
+        default_decay (float, optional): Decay of traders not in decay, 1 keeps their signal forever.
+        products (Iterable[str], optional): Products to index up front, others are added as they trade.
+        mark (float, optional): Signal set by a trade, None to accumulate quantities.
+        tick (int, optional): Timestamp step of one tick.
+    """
+
+    def __init__(self, decay: Mapping[str, float] = None, default_decay: float = 1.0, products: Iterable[str] = (),
+                 mark: float = 1.5, tick: int = TICK):
+        self.decays = dict(decay or {})
+        self.default_decay = default_decay
+        self.mark = mark
+        self.tick = tick
+        self.traders: Dict[str, int] = {}
+        self.products: Dict[str, int] = {}
+        self.decay = np.ones(0)                     # per trader row
+        self.last = np.zeros(0, dtype=np.int64)     # timestamp each row's signal is current at
+        self.signal = np.zeros((0, 0))
+        self.position = np.zeros((0, 0), dtype=np.int64)
+        for product in products:
+            self.product_index(product)
+
+    def trader_index(self, trader: str) -> int:
+        index = self.traders.get(trader)
+        if index is None:
+            index = self.traders[trader] = len(self.traders)
+            if index == len(self.decay):
+                # Grow by doubling so adding traders stays amortized O(1)
+                rows = max(8, 2 * index)
+                self.decay = np.concatenate([self.decay, np.full(rows - index, self.default_decay)])
+                self.last = np.concatenate([self.last, np.zeros(rows - index, dtype=np.int64)])
+                self.signal = np.vstack([self.signal, np.zeros((rows - index, self.signal.shape[1]))])
+                self.position = np.vstack([self.position, np.zeros((rows - index, self.position.shape[1]), dtype=np.int64)])
+            self.decay[index] = self.decays.get(trader, self.default_decay)
+        return index
+
+    def product_index(self, product: str) -> int:
+        index = self.products.get(product)
+        if index is None:
+            index = self.products[product] = len(self.products)
+            if index == self.signal.shape[1]:
+                columns = max(4, 2 * index)
+                self.signal = np.hstack([self.signal, np.zeros((self.signal.shape[0], columns - index))])
+                self.position = np.hstack([self.position, np.zeros((self.position.shape[0], columns - index), dtype=np.int64)])
+        return index
+
+    def _factors(self, rows, timestamp: int) -> np.ndarray:
+        ticks = np.maximum(timestamp - self.last[rows], 0) // self.tick
+        # 0 ** 0 == 1, so a zero decay only wipes the signal once a tick has passed
+        return self.decay[rows] ** ticks
+
+    def _advance(self, row: int, timestamp: int) -> None:
+        """
+        Bring one trader's signal row up to timestamp.
+        """
+        if timestamp > self.last[row]:
+            self.signal[row] *= self._factors(row, timestamp)
+            self.last[row] = timestamp
+
+    def add(self, trader: str, product: str, quantity: int, timestamp: int) -> None:
+        """
+        Book signed quantity (positive bought) for one side of a trade.
+        """
+        if not trader or quantity == 0:
+            return
+        row, column = self.trader_index(trader), self.product_index(product)
+        self._advance(row, timestamp)
+        if self.mark is None:
+            self.signal[row, column] += quantity
+        else:
+            self.signal[row, column] = self.mark if quantity > 0 else -self.mark
+        self.position[row, column] += quantity
+
+    def book_trades(self, trades: Iterable[Trade], timestamp: int) -> None:
+        """
+        Book both sides of each trade at timestamp. Trades with a trader on both sides are skipped.
+        """
+        for trade in trades:
+            if trade.buyer == trade.seller:
+                continue
+            self.add(trade.buyer, trade.symbol, trade.quantity, timestamp)
+            self.add(trade.seller, trade.symbol, -trade.quantity, timestamp)
+
+    def update(self, state: TradingState) -> None:
+        """
+        Book this tick's market_trades, once per run() like StanfordCardinals.
+        """
+        for trades in state.market_trades.values():
+            self.book_trades(trades, state.timestamp)
+
+    def flow(self, trader: str, product: str, timestamp: int = None) -> float:
+        """
+        Decayed signal of trader in product at timestamp (default: when it was last set), 0 if never seen.
+        """
+        row, column = self.traders.get(trader), self.products.get(product)
+        if row is None or column is None:
+            return 0.0
+        value = self.signal[row, column]
+        return float(value * self._factors(row, timestamp)) if timestamp is not None else float(value)
+
+    def direction(self, trader: str, product: str, timestamp: int = None) -> int:
+        """
+        Sign of the rounded signal, StanfordCardinals' int(round(person_position[trader][product])) test.
+        """
+        return int(np.sign(round(self.flow(trader, product, timestamp))))
+
+    def net_position(self, trader: str, product: str) -> int:
+        """
+        Undecayed net quantity trader has bought in product.
+        """
+        row, column = self.traders.get(trader), self.products.get(product)
+        if row is None or column is None:
+            return 0
+        return int(self.position[row, column])
+
+    def flows(self, timestamp: int) -> np.ndarray:
+        """
+        (traders, products) matrix of every signal decayed to timestamp, rows and columns in index order.
+        """
+        rows = len(self.traders)
+        factors = self._factors(np.arange(rows), timestamp)
+        return self.signal[:rows, :len(self.products)] * factors[:, None]
+
+    def net(self, product: str, timestamp: int) -> Dict[str, float]:
+        """
+        Every trader's decayed signal in product at timestamp, skipping zeros.
+        """
+        column = self.products.get(product)
+        if column is None:
+            return {}
+        values = self.flows(timestamp)[:, column]
+        return {trader: float(values[row]) for trader, row in self.traders.items() if values[row] != 0}
+
+    def frame(self, timestamp: int) -> pd.DataFrame:
+        """
+        Decayed signals at timestamp as a trader x product DataFrame.
+        """
+        return pd.DataFrame(self.flows(timestamp), index=list(self.traders), columns=list(self.products))
+
+    def __getstate__(self):
+        # Only the used part of the matrices, as lists, so it fits in traderData
+        rows, columns = len(self.traders), len(self.products)
+        return {'d': self.decays, 'dd': self.default_decay, 'm': self.mark, 'k': self.tick,
+                't': list(self.traders), 'p': list(self.products), 'l': self.last[:rows].tolist(),
+                's': self.signal[:rows, :columns].tolist(), 'q': self.position[:rows, :columns].tolist()}
+
+    def __setstate__(self, state):
+        self.__init__(state['d'], state['dd'], state['p'], state['m'], state['k'])
+        for trader in state['t']:
+            self.trader_index(trader)
+        rows, columns = len(self.traders), len(self.products)
+        if rows and columns:
+            self.last[:rows] = state['l']
+            self.signal[:rows, :columns] = state['s']
+            self.position[:rows, :columns] = state['q']
+
+
+def check_stanford(ticks: int = 3000, traders: int = 12, seed: int = 0) -> float:
+    """
+    Replay random named trades through StanfordCardinals' dict-and-loop bookkeeping and CounterpartyFlow side by
+    side, and return the largest absolute difference in any signal or position seen by the strategy.
+    """
+    from collections import defaultdict
+    rng = np.random.default_rng(seed)
+    names = ['Olivia', 'Pablo', 'Camilla'] + [f'Trader{i}' for i in range(traders - 3)]
+    products = ['UKULELE', 'BERRIES', 'DIP', 'BAGUETTE', 'PICNIC_BASKET']
+    person_position = defaultdict(lambda: {product: 0 for product in products})
+    person_actval = defaultdict(lambda: {product: 0 for product in products})
+    flow = CounterpartyFlow(STANFORD_DECAY)
+    worst = 0.0
+    for tick in range(ticks):
+        timestamp = tick * TICK
+        trades = []
+        # Quiet stretches exercise the multi-tick lazy decay
+        for _ in range(rng.integers(0, 4) if rng.random() < 0.7 else 0):
+            buyer, seller = rng.choice(names, 2)
+            trades.append(Trade(str(rng.choice(products)), 100, int(rng.integers(1, 10)), str(buyer), str(seller), timestamp))
+        for trade in trades:
+            if trade.buyer == trade.seller:
+                continue
+            person_position[trade.buyer][trade.symbol] = 1.5
+            person_position[trade.seller][trade.symbol] = -1.5
+            person_actval[trade.buyer][trade.symbol] += trade.quantity
+            person_actval[trade.seller][trade.symbol] -= trade.quantity
+        flow.book_trades(trades, timestamp)
+        if tick % 500 == 0:
+            # Round trip through traderData part way
+            restored = CounterpartyFlow.__new__(CounterpartyFlow)
+            restored.__setstate__(flow.__getstate__())
+            flow = restored
+        for person in person_position:
+            for product in products:
+                worst = max(worst, abs(person_position[person][product] - flow.flow(person, product, timestamp)),
+                            abs(person_actval[person][product] - flow.net_position(person, product)))
+        for person in person_position:
+            for product in person_position[person]:
+                if person == 'Olivia':
+                    person_position[person][product] *= 0.995
+                if person == 'Pablo':
+                    person_position[person][product] *= 0.8
+                if person == 'Camilla':
+                    person_position[person][product] *= 0
+    return worst
+
+
+if __name__ == '__main__':
+    import time
+    start = time.perf_counter()
+    error = check_stanford()
+    print(f"max abs difference vs StanfordCardinals bookkeeping {error:.3e} ({time.perf_counter() - start:.2f} s)")
+    assert error < 1e-9, "CounterpartyFlow does not match StanfordCardinals"
@@ -0,0 +1,105 @@
+from typing import Tuple
+from OrderBookStore import ProductBook
+import numpy as np
+
+# Author: Alex Morrow
+# Whole-day fill simulation as array operations. Given the book levels of every tick and the order we would send at
+# every tick, work out what fills, at what average price and what is left over, with no Python loop over ticks.
+
+
+class FillResult:
+    """
+    Per-tick fills for one product.
+
+    Attributes:
+        filled (np.ndarray): Signed filled quantity, positive for buys.
+        vwap (np.ndarray): Average fill price, NaN where nothing filled.
+        residual (np.ndarray): Signed quantity left unfilled.
+        cash (np.ndarray): Cash flow of the fills, negative for buys.
+    """
+
+    def __init__(self, filled: np.ndarray, vwap: np.ndarray, residual: np.ndarray, cash: np.ndarray):
+        self.filled = filled
+        self.vwap = vwap
+        self.residual = residual
+        self.cash = cash
+
+    def position(self, start: int = 0) -> np.ndarray:
+        return start + np.cumsum(self.filled)
+
+    def pnl(self, mid_price: np.ndarray, start_position: int = 0) -> np.ndarray:
+        """
+        Mark-to-market PnL after each tick, valuing the position at mid_price.
+        """
+        return np.cumsum(self.cash) + self.position(start_position) * mid_price
+
+
+def sweep_levels(level_price: np.ndarray, level_volume: np.ndarray, limit_price: np.ndarray, quantity: np.ndarray, buy: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fill unsigned quantities against one side of the book, best level first.
+
+    Args:
+        level_price (np.ndarray): (T, L) prices of the opposite side, best level in column 0.
+        level_volume (np.ndarray): (T, L) positive volumes, 0 for empty levels.
+        limit_price (np.ndarray): (T,) order limit prices.
+        quantity (np.ndarray): (T,) unsigned order quantities.
+        buy (bool): True when the orders are buys (so level_price are asks).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (filled quantity, notional) per tick, both unsigned.
+    """
+    limit_price = np.asarray(limit_price)[:, None]
+    eligible = (level_price <= limit_price) if buy else (level_price >= limit_price)
+    available = np.where(eligible & (level_volume > 0), level_volume, 0)
+    # Levels are sorted best first, so an order takes min(what is left of it, the level) walking down the book
+    before = np.cumsum(available, axis=1) - available
+    take = np.clip(np.asarray(quantity)[:, None] - before, 0, available)
+    return take.sum(axis=1), (take * level_price).sum(axis=1)
+
+
+def simulate_orders(book: ProductBook, order_price: np.ndarray, order_quantity: np.ndarray) -> FillResult:
+    """
+    Fill one signed order per tick (positive buys against the asks, negative sells against the bids).
+
+    Position limits are path dependent and not applied here, size orders so they respect them or use the
+    Backtester for exact replay.
+
+    Args:
+        book (ProductBook): Columnar book of the product, e.g. load_book(path).products['STARFRUIT'].
+        order_price (np.ndarray): (T,) limit prices, one per book row.
+        order_quantity (np.ndarray): (T,) signed quantities, 0 for no order.
+
+    Returns:
+        FillResult: Per-tick fills.
+    """
+    order_price = np.asarray(order_price, dtype=np.float64)
+    order_quantity = np.asarray(order_quantity, dtype=np.int64)
+    buys = np.maximum(order_quantity, 0)
+    sells = np.maximum(-order_quantity, 0)
+
+    bought, buy_notional = sweep_levels(book.ask_price, book.ask_volume, order_price, buys, buy=True)
+    sold, sell_notional = sweep_levels(book.bid_price, book.bid_volume, order_price, sells, buy=False)
+
+    filled = bought - sold
+    traded = bought + sold
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vwap = np.where(traded > 0, (buy_notional + sell_notional) / traded, np.nan)
+    return FillResult(filled, vwap, order_quantity - filled, sell_notional - buy_notional)
+
+
+def simulate_quotes(book: ProductBook, bid_price: np.ndarray, bid_quantity: np.ndarray, ask_price: np.ndarray, ask_quantity: np.ndarray) -> FillResult:
+    """
+    Fill a buy and a sell order on every tick at once, e.g. both sides of a band strategy.
+
+    The two sides take liquidity from opposite sides of the book so they never compete for volume. Quantities are
+    unsigned, residual is reported as the net signed leftover.
+    """
+    bought, buy_notional = sweep_levels(book.ask_price, book.ask_volume, np.asarray(bid_price, dtype=np.float64),
+                                        np.asarray(bid_quantity, dtype=np.int64), buy=True)
+    sold, sell_notional = sweep_levels(book.bid_price, book.bid_volume, np.asarray(ask_price, dtype=np.float64),
+                                       np.asarray(ask_quantity, dtype=np.int64), buy=False)
+    traded = bought + sold
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vwap = np.where(traded > 0, (buy_notional + sell_notional) / traded, np.nan)
+    residual = (np.asarray(bid_quantity) - bought) - (np.asarray(ask_quantity) - sold)
+    return FillResult(bought - sold, vwap, residual, sell_notional - buy_notional)
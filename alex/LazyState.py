@@ -0,0 +1,146 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping
+from datamodel import ConversionObservation, Observation, OrderDepth
+from OrderBookStore import OBSERVATION_COLUMNS, DayBook
+
+# Author: Alex Morrow
+# Replay ticks backed directly by the columnar DayBook. A tick's order_depths is a mapping that only builds a
+# product's OrderDepth when the Trader first looks it up, so a Trader that reads one product pays for one.
+
+
+class LazyMapping(Mapping):
+    """
+    Read-only mapping over fixed keys whose values are built by factory(key) on first access and then cached.
+    """
+
+    __slots__ = ('_keys', '_factory', '_values')
+
+    def __init__(self, keys: Iterable[str], factory: Callable[[str], object]):
+        self._keys = keys if isinstance(keys, (list, tuple)) else list(keys)
+        self._factory = factory
+        self._values: Dict[str, object] = {}
+
+    def __getitem__(self, key):
+        value = self._values.get(key)
+        if value is None:
+            if key not in self._keys:
+                raise KeyError(key)
+            value = self._values[key] = self._factory(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"LazyMapping({list(self._keys)}, built={list(self._values)})"
+
+
+class BookTick:
+    """
+    One tick of a DayBook, with the same interface the Backtester uses on Tick.
+
+    Attributes:
+        day, timestamp (int): Tick key.
+        mid_prices (Mapping[str, float]): Read straight from the book's columns.
+    """
+
+    __slots__ = ('ticks', 'index', 'day', 'timestamp', 'products', 'mid_prices')
+
+    def __init__(self, ticks: 'BookTicks', index: int):
+        self.ticks = ticks
+        self.index = index
+        self.day = ticks.days[index]
+        self.timestamp = ticks.timestamps[index]
+        self.products = ticks.products_at[index]
+        self.mid_prices = LazyMapping(self.products, self._mid_price)
+
+    def _mid_price(self, product: str) -> float:
+        return self.ticks.mid_prices[product][self.ticks.rows[product][self.index]]
+
+    def _order_depth(self, product: str) -> OrderDepth:
+        bid_price, bid_volume, ask_price, ask_volume = self.ticks.levels(product)
+        row = self.ticks.rows[product][self.index]
+        depth = OrderDepth()
+        for price, vol in zip(bid_price[row], bid_volume[row]):
+            if vol > 0:
+                depth.buy_orders[price] = vol
+        for price, vol in zip(ask_price[row], ask_volume[row]):
+            if vol > 0:
+                depth.sell_orders[price] = -vol
+        return depth
+
+    def order_depths(self) -> LazyMapping:
+        """
+        A fresh lazy OrderDepth mapping (platform convention: sell volumes negative, best level first).
+        """
+        return LazyMapping(self.products, self._order_depth)
+
+    def observations(self) -> Observation:
+        """
+        Conversion observations joined into the book (DayBook.join_observations) for this tick.
+        """
+        conversions = {}
+        for product, columns in self.ticks.observations.items():
+            values = [column[self.index] for column in columns]
+            if values[0] == values[0]:  # NaN where this tick has no observation
+                conversions[product] = ConversionObservation(*values)
+        return Observation({}, conversions)
+
+    def market_trades(self) -> LazyMapping:
+        """
+        Market trades per product. The price-level CSVs carry no trades, so every product maps to an empty list.
+        """
+        return LazyMapping(self.products, lambda product: [])
+
+
+class BookTicks:
+    """
+    Sequence of BookTicks over a DayBook, the lazy counterpart of Backtester.ticks_from_book.
+
+    Per-tick product lists and mid prices are converted to Python lists once up front. A product's level arrays are
+    converted on the first OrderDepth built for it, so products no Trader looks at are never read from disk.
+    """
+
+    def __init__(self, book: DayBook):
+        self.book = book
+        self.products = sorted(book.products)
+        self.days: List[int] = book.tick_day.tolist()
+        self.timestamps: List[int] = book.tick_timestamp.tolist()
+        self.rows: Dict[str, List[int]] = {product: book.rows[product].tolist() for product in self.products}
+        self.mid_prices: Dict[str, List[float]] = {product: book.products[product].mid_price.tolist() for product in self.products}
+        self.products_at: List[tuple] = [tuple(product for product in self.products if self.rows[product][i] >= 0)
+                                         for i in range(len(self.days))]
+        self._levels: Dict[str, tuple] = {}
+        # product -> one list per OBSERVATION_COLUMNS, in ConversionObservation argument order
+        self.observations: Dict[str, List[List[float]]] = {
+            product: [columns[name].tolist() for name in OBSERVATION_COLUMNS] for product, columns in book.observations.items()}
+
+    def levels(self, product: str) -> tuple:
+        """
+        (bid_price, bid_volume, ask_price, ask_volume) of a product as nested lists, one row per book row.
+        """
+        levels = self._levels.get(product)
+        if levels is None:
+            book = self.book.products[product]
+            levels = self._levels[product] = (book.bid_price.tolist(), book.bid_volume.tolist(),
+                                              book.ask_price.tolist(), book.ask_volume.tolist())
+        return levels
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __getitem__(self, index: int) -> BookTick:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('BookTicks index out of range')
+        return BookTick(self, index)
+
+    def __iter__(self) -> Iterator[BookTick]:
+        for index in range(len(self)):
+            yield BookTick(self, index)
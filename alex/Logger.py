@@ -0,0 +1,106 @@
+from typing import Any, Callable, Iterable, List, Tuple, Union
+import json
+import pandas as pd
+
+# Author: Alex Morrow
+# Buffered structured logging for Traders. Instead of several print(f"...") calls per order, records are buffered
+# during run() and written as one compact line per tick:
+#
+#   from Logger import LOG
+#   LOG.debug('ORCHIDS', 'compare', ask=ask, pred_bid=pred_bid_adjusted)    # dropped unless level is DEBUG
+#   LOG.info('ORCHIDS', 'buy', price=ask, qty=quantity)
+#   ...
+#   LOG.flush(state.timestamp)                                              # once, at the end of run()
+#
+# and parse_logs() turns the printed lines back into a DataFrame.
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING'}
+PREFIX = '#L '
+
+
+class TickLogger:
+    """
+    Collects (level, product, event, fields) records and emits them as one line per flush.
+
+    Calls below `level` return before building anything, and `debug_enabled` lets hot loops skip computing
+    expensive fields altogether:
+
+        if LOG.debug_enabled:
+            LOG.debug(product, 'book', bids=dict(order_depth.buy_orders))
+
+    Args:
+        level (int, optional): Minimum level kept. Defaults to INFO.
+        sink (Callable[[str], None], optional): Where flushed lines go. Defaults to print, i.e. the platform log.
+    """
+
+    def __init__(self, level: int = INFO, sink: Callable[[str], None] = print):
+        self.sink = sink
+        self.records: List[Tuple[int, str, str, dict]] = []
+        self.set_level(level)
+
+    def set_level(self, level: int) -> None:
+        self.level = level
+        self.debug_enabled = level <= DEBUG
+
+    def log(self, level: int, product: str, event: str, **fields: Any) -> None:
+        if level >= self.level:
+            self.records.append((level, product, event, fields))
+
+    def debug(self, product: str, event: str, **fields: Any) -> None:
+        if self.debug_enabled:
+            self.records.append((DEBUG, product, event, fields))
+
+    def info(self, product: str, event: str, **fields: Any) -> None:
+        if self.level <= INFO:
+            self.records.append((INFO, product, event, fields))
+
+    def warning(self, product: str, event: str, **fields: Any) -> None:
+        if self.level <= WARNING:
+            self.records.append((WARNING, product, event, fields))
+
+    def flush(self, timestamp: int) -> None:
+        """
+        Emit everything logged since the last flush as one line, nothing if the buffer is empty.
+        """
+        if not self.records:
+            return
+        payload = [[level, product, event, fields] for level, product, event, fields in self.records]
+        self.records = []
+        self.sink(PREFIX + str(timestamp) + ' ' + json.dumps(payload, separators=(',', ':'), default=str))
+
+
+# Shared instance for Trader code
+LOG = TickLogger()
+
+
+def parse_logs(source: Union[str, Iterable[str]]) -> pd.DataFrame:
+    """
+    Turn flushed log lines back into one row per record.
+
+    Args:
+        source: Path to a log file, or an iterable of lines (e.g. captured stdout). Lines without the logger prefix
+            are ignored, so regular prints can be mixed in.
+
+    Returns:
+        pd.DataFrame: timestamp, level, product, event, plus one column per field name seen.
+    """
+    if isinstance(source, str):
+        with open(source) as f:
+            lines = f.read().splitlines()
+    else:
+        lines = source
+
+    rows = []
+    for line in lines:
+        start = line.find(PREFIX)
+        if start < 0:
+            continue
+        timestamp, _, payload = line[start + len(PREFIX):].partition(' ')
+        for level, product, event, fields in json.loads(payload):
+            row = {'timestamp': int(timestamp), 'level': LEVEL_NAMES.get(level, level), 'product': product, 'event': event}
+            row.update(fields)
+            rows.append(row)
+    return pd.DataFrame(rows)
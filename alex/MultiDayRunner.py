@@ -0,0 +1,152 @@
+from typing import Any, Dict, List
+from Backtester import Backtester, build_caches, cached_ticks, cached_trader
+from Profiler import LatencyProfiler
+import argparse
+import multiprocessing
+import os
+import queue
+import time
+import pandas as pd
+
+# Author: Alex Morrow
+# Backtest one or more strategies over every day at once. Each (strategy, day) pair runs in its own worker process
+# and streams its per-tick PnL back to the parent over a queue, so a full evaluation takes about as long as the
+# slowest single day and the parent can show progress while it runs.
+
+CHUNK_TICKS = 500   # Ticks per message sent back to the parent
+
+_queue = None
+
+
+def _init_worker(messages) -> None:
+    global _queue
+    _queue = messages
+
+
+def run_shard(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Backtest one strategy on one day inside a worker, sending ('ticks', job id, rows) every CHUNK_TICKS ticks.
+    """
+    start = time.perf_counter()
+    rows: List[tuple] = []
+
+    def on_tick(timestamp: int, pnl: Dict[str, float], position: Dict[str, int]) -> None:
+        rows.append((timestamp, pnl, position))
+        if len(rows) >= CHUNK_TICKS:
+            _queue.put(('ticks', job['id'], list(rows)))
+            rows.clear()
+
+    result = Backtester(cached_trader(job['strategy']), cached_ticks(job['data']),
+                        profiler=LatencyProfiler(enabled=False), on_tick=on_tick).run()
+    if rows:
+        _queue.put(('ticks', job['id'], rows))
+    summary = {'strategy': job['label'], 'day': job['day']}
+    summary.update(result.summary_row(time.perf_counter() - start))
+    _queue.put(('done', job['id'], summary))
+    return summary
+
+
+class MultiDayReport:
+    """
+    Merged output of run_days.
+
+    Attributes:
+        summary (pd.DataFrame): One row per (strategy, day) with pnl, trades, max_position, max_drawdown, seconds and
+            per-product pnl.
+        ticks (pd.DataFrame): Per-tick rows (strategy, day, timestamp, product, pnl, position) as streamed by the workers.
+    """
+
+    def __init__(self, summary: pd.DataFrame, ticks: pd.DataFrame):
+        self.summary = summary
+        self.ticks = ticks
+
+    def by_day(self) -> pd.DataFrame:
+        """
+        Strategy x day table of final PnL with a total column, best total first.
+        """
+        table = self.summary.pivot(index='strategy', columns='day', values='pnl')
+        table['total'] = table.sum(axis=1)
+        table['worst_day'] = table.drop(columns='total').min(axis=1)
+        return table.sort_values('total', ascending=False)
+
+    def equity_curves(self) -> pd.DataFrame:
+        """
+        Total PnL per tick, one column per (strategy, day).
+        """
+        total = self.ticks.groupby(['strategy', 'day', 'timestamp'])['pnl'].sum()
+        return total.unstack(['strategy', 'day'])
+
+
+def run_days(strategies: List[str], data: List[str], processes: int = None, progress: bool = False) -> MultiDayReport:
+    """
+    Backtest every strategy on every data file in parallel, one worker task per (strategy, file).
+
+    Longest files are scheduled first so no large day is left waiting behind small ones at the end.
+
+    Args:
+        strategies (List[str]): Strategy files containing a Trader class.
+        data (List[str]): Price-level CSVs, each replayed as an independent day.
+        processes (int, optional): Pool size. Defaults to all cores.
+        progress (bool, optional): Print each shard's tick count as its PnL streams in.
+    """
+    strategies = [os.path.abspath(path) for path in strategies]
+    data = [os.path.abspath(path) for path in data]
+    build_caches(data)
+
+    labels = {path: os.path.relpath(path) for path in strategies}
+    jobs = [{'strategy': strategy, 'label': labels[strategy], 'data': path,
+             'day': os.path.splitext(os.path.basename(path))[0]}
+            for strategy in strategies for path in sorted(data, key=os.path.getsize, reverse=True)]
+    for i, job in enumerate(jobs):
+        job['id'] = i
+
+    streamed: Dict[int, List[tuple]] = {job['id']: [] for job in jobs}
+    summaries: Dict[int, Dict[str, Any]] = {}
+    messages = multiprocessing.Queue()
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(messages,)) as pool:
+        pending = pool.map_async(run_shard, jobs, chunksize=1)
+        while len(summaries) < len(jobs):
+            try:
+                kind, job_id, payload = messages.get(timeout=0.1)
+            except queue.Empty:
+                if pending.ready() and not pending.successful():
+                    pending.get()   # Re-raises the worker's exception
+                continue
+            if kind == 'ticks':
+                streamed[job_id].extend(payload)
+                if progress:
+                    job = jobs[job_id]
+                    print(f"{job['label']} {job['day']}: {len(streamed[job_id])} ticks, pnl {sum(payload[-1][1].values()):.1f}")
+            else:
+                summaries[job_id] = payload
+
+    rows = []
+    for job in jobs:
+        for timestamp, pnl, position in streamed[job['id']]:
+            for product, value in pnl.items():
+                rows.append((job['label'], job['day'], timestamp, product, value, position[product]))
+    ticks = pd.DataFrame(rows, columns=['strategy', 'day', 'timestamp', 'product', 'pnl', 'position'])
+    summary = pd.DataFrame([summaries[job['id']] for job in jobs])
+    return MultiDayReport(summary, ticks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest strategies over several days in parallel.')
+    parser.add_argument('strategies', nargs='+', help='Strategy files containing a Trader class')
+    parser.add_argument('--data', nargs='+', required=True, help='Price CSVs, one day each')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--progress', action='store_true', help='Print PnL as it streams in from the workers')
+    parser.add_argument('--out', default=None, help='CSV path for the per-tick PnL of every run')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = run_days(args.strategies, args.data, args.processes, args.progress)
+    print(f"{len(report.summary)} backtests in {time.perf_counter() - start:.1f}s "
+          f"(slowest single day {report.summary['seconds'].max():.1f}s)")
+    print(report.by_day().to_string())
+    if args.out:
+        report.ticks.to_csv(args.out, index=False)
+
+
+if __name__ == '__main__':
+    main()
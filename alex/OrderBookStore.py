@@ -0,0 +1,272 @@
+from typing import Dict, List, Tuple
+import json
+import os
+import re
+import warnings
+import numpy as np
+import pandas as pd
+
+# Author: Alex Morrow
+# Columnar cache for the price-level CSVs. Each CSV is parsed once into per-product NumPy arrays that are saved as
+# .npy files and memory-mapped on every later load, so backtests and notebooks skip the CSV parse entirely.
+
+LEVELS = 3
+# Buyer or seller name of our own side of a trade
+SUBMISSION = 'SUBMISSION'
+COLUMNS = ['bid_price', 'bid_volume', 'ask_price', 'ask_volume']
+CACHE_VERSION = 1
+CACHE_DIR = '.book_cache'
+# ConversionObservation fields, in constructor order, as named in the platform's observations CSVs
+OBSERVATION_COLUMNS = ['bidPrice', 'askPrice', 'transportFees', 'exportTariff', 'importTariff', 'sunlight', 'humidity']
+
+# Composite (day, timestamp) key, days can be negative (Day_-2.csv) and timestamps stay below 1e8
+KEY_DAY_OFFSET = 1000
+KEY_DAY_SPAN = 10 ** 8
+
+
+def tick_key(day, timestamp):
+    return (np.asarray(day, dtype=np.int64) + KEY_DAY_OFFSET) * KEY_DAY_SPAN + np.asarray(timestamp, dtype=np.int64)
+
+
+class ProductBook:
+    """
+    All rows of one product, sorted by (day, timestamp).
+
+    Level arrays have shape (rows, 3) with level 1 in column 0. Missing levels have price 0 and volume 0.
+    Volumes are positive on both sides, as in the CSV.
+    """
+
+    def __init__(self, product: str, day: np.ndarray, timestamp: np.ndarray, levels: Dict[str, np.ndarray], mid_price: np.ndarray):
+        self.product = product
+        self.day = day
+        self.timestamp = timestamp
+        self.bid_price = levels['bid_price']
+        self.bid_volume = levels['bid_volume']
+        self.ask_price = levels['ask_price']
+        self.ask_volume = levels['ask_volume']
+        self.mid_price = mid_price
+        self.keys = tick_key(day, timestamp)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def levels(self, row: int) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        """
+        Returns:
+            Tuple of (bids, asks) as (price, volume) lists, best level first, empty levels dropped.
+        """
+        bid_price, bid_volume = self.bid_price[row].tolist(), self.bid_volume[row].tolist()
+        ask_price, ask_volume = self.ask_price[row].tolist(), self.ask_volume[row].tolist()
+        bids = [(bid_price[i], bid_volume[i]) for i in range(LEVELS) if bid_volume[i] > 0]
+        asks = [(ask_price[i], ask_volume[i]) for i in range(LEVELS) if ask_volume[i] > 0]
+        return bids, asks
+
+
+class DayBook:
+    """
+    Columnar order book for one CSV, keyed by (day, timestamp, product).
+
+    Attributes:
+        products (Dict[str, ProductBook]): Per-product columns.
+        tick_day, tick_timestamp (np.ndarray): Every distinct (day, timestamp) in the file, sorted.
+        rows (Dict[str, np.ndarray]): For each product, the row in its ProductBook at each tick, -1 where the product
+            has no quote at that tick.
+        observations (Dict[str, Dict[str, np.ndarray]]): Conversion observations joined with join_observations,
+            product -> OBSERVATION_COLUMNS -> value at each tick, NaN where there is none.
+    """
+
+    def __init__(self, products: Dict[str, ProductBook]):
+        self.products = products
+        keys = np.unique(np.concatenate([book.keys for book in products.values()])) if products else np.zeros(0, dtype=np.int64)
+        self.tick_keys = keys
+        self.tick_day = keys // KEY_DAY_SPAN - KEY_DAY_OFFSET
+        self.tick_timestamp = keys % KEY_DAY_SPAN
+        self.rows: Dict[str, np.ndarray] = {}
+        for product, book in products.items():
+            pos = np.searchsorted(book.keys, keys)
+            pos_clipped = np.minimum(pos, len(book) - 1)
+            self.rows[product] = np.where(book.keys[pos_clipped] == keys, pos_clipped, -1)
+        self.observations: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.tick_keys)
+
+    def locate(self, day: int, timestamp: int, product: str) -> int:
+        """
+        Row of (day, timestamp) in products[product], or -1 if there is none.
+        """
+        book = self.products.get(product)
+        if book is None:
+            return -1
+        key = tick_key(day, timestamp)
+        pos = int(np.searchsorted(book.keys, key))
+        return pos if pos < len(book) and book.keys[pos] == key else -1
+
+    def join_observations(self, observations: pd.DataFrame, product: str = 'ORCHIDS') -> None:
+        """
+        Line up conversion observations (see load_observations) with the ticks, by (day, timestamp), or by timestamp
+        alone when observations has no day column.
+
+        Raises:
+            ValueError: If no tick has an observation, e.g. the observations are for another day than the book.
+        """
+        if 'day' in observations.columns:
+            keys = tick_key(observations['day'].to_numpy(), observations['timestamp'].to_numpy())
+            tick_keys = self.tick_keys
+        else:
+            keys = observations['timestamp'].to_numpy(dtype=np.int64)
+            tick_keys = self.tick_timestamp
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        pos = np.minimum(np.searchsorted(keys, tick_keys), max(len(keys) - 1, 0))
+        found = (keys[pos] == tick_keys) if len(keys) else np.zeros(len(tick_keys), dtype=bool)
+        matched = int(found.sum())
+        if matched < len(tick_keys):
+            days = ''
+            observed, booked = sorted(set(observations.get('day', []))), sorted(set(self.tick_day.tolist()))
+            if observed and observed != booked:
+                # Name where the day came from, a file name that says day_2 is the usual culprit
+                source = observations.attrs.get('day_source', 'day column')
+                days = f", observations are for day {observed} ({source}), the book has day {booked}"
+            message = f"{product} observations match {matched} of {len(tick_keys)} ticks{days}"
+            if matched == 0:
+                raise ValueError(message)
+            warnings.warn(message)
+        self.observations[product] = {
+            column: np.where(found, observations[column].to_numpy(dtype=np.float64)[order][pos], np.nan)
+            for column in OBSERVATION_COLUMNS}
+
+    def as_frame(self, product: str) -> pd.DataFrame:
+        """
+        Rebuild the CSV layout for one product, for notebook analysis.
+        """
+        book = self.products[product]
+        frame = {'day': np.asarray(book.day), 'timestamp': np.asarray(book.timestamp), 'product': product}
+        for column in COLUMNS:
+            values = getattr(book, column)
+            for level in range(LEVELS):
+                frame[f'{column}_{level + 1}'] = np.asarray(values[:, level])
+        frame['mid_price'] = np.asarray(book.mid_price)
+        return pd.DataFrame(frame)
+
+
+def sniff_separator(path: str) -> str:
+    """
+    ';' for the semicolon separated platform exports, ',' for the CSVs in this repo, decided from the header.
+    """
+    with open(path) as f:
+        header = f.readline()
+    return ';' if header.count(';') > header.count(',') else ','
+
+
+def parse_csv(path: str) -> DayBook:
+    """
+    Parse a price-level CSV (comma or semicolon separated, any column order) straight into a DayBook.
+    """
+    sep = sniff_separator(path)
+    df = pd.read_csv(path, sep=sep)
+    df = df.sort_values(['day', 'timestamp', 'product'], kind='stable')
+
+    products = {}
+    for product, group in df.groupby('product', sort=True):
+        levels = {}
+        for column in COLUMNS:
+            values = group[[f'{column}_{level}' for level in range(1, LEVELS + 1)]].to_numpy(dtype=np.float64)
+            levels[column] = np.abs(np.nan_to_num(values, nan=0.0)).astype(np.int64)
+        levels['bid_price'] = np.where(levels['bid_volume'] > 0, levels['bid_price'], 0)
+        levels['ask_price'] = np.where(levels['ask_volume'] > 0, levels['ask_price'], 0)
+        products[product] = ProductBook(product,
+                                        group['day'].to_numpy(dtype=np.int64),
+                                        group['timestamp'].to_numpy(dtype=np.int64),
+                                        levels,
+                                        group['mid_price'].to_numpy(dtype=np.float64))
+    return DayBook(products)
+
+
+def load_observations(path: str, day: int = None) -> pd.DataFrame:
+    """
+    Read a conversion observations CSV (timestamp plus OBSERVATION_COLUMNS, comma or semicolon separated).
+
+    The platform files have no day column. It is taken from `day`, else from a 'day_<n>' in the file name, else left
+    out, in which case join_observations matches on timestamp alone. frame.attrs['day_source'] records which, so
+    join_observations can say where a wrong day came from.
+    """
+    sep = sniff_separator(path)
+    frame = pd.read_csv(path, sep=sep)
+    missing = [column for column in ['timestamp'] + OBSERVATION_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"{path} is missing observation columns {missing}")
+    if 'day' not in frame.columns:
+        match = re.search(r'day_?(-?\d+)', os.path.basename(path), re.IGNORECASE)
+        if day is not None:
+            frame.attrs['day_source'] = 'day argument'
+        elif match:
+            day = int(match.group(1))
+            frame.attrs['day_source'] = f"from the file name {os.path.basename(path)}"
+        if day is not None:
+            frame['day'] = day
+    return frame
+
+
+def _cache_path(path: str, cache_dir: str = None) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    root = cache_dir if cache_dir is not None else os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    return os.path.join(root, stem)
+
+
+def _source_meta(path: str) -> Dict:
+    stat = os.stat(path)
+    return {'version': CACHE_VERSION, 'source': os.path.abspath(path), 'mtime': stat.st_mtime, 'size': stat.st_size}
+
+
+def save_book(book: DayBook, folder: str, meta: Dict) -> None:
+    os.makedirs(folder, exist_ok=True)
+    for product, pbook in book.products.items():
+        arrays = {'day': pbook.day, 'timestamp': pbook.timestamp, 'mid_price': pbook.mid_price}
+        arrays.update({column: getattr(pbook, column) for column in COLUMNS})
+        for name, values in arrays.items():
+            np.save(os.path.join(folder, f'{product}__{name}.npy'), np.ascontiguousarray(values))
+    # meta.json is written last so a half-written cache is never picked up
+    with open(os.path.join(folder, 'meta.json'), 'w') as f:
+        json.dump(dict(meta, products=sorted(book.products)), f)
+
+
+def open_book(folder: str, mmap: bool = True) -> DayBook:
+    with open(os.path.join(folder, 'meta.json')) as f:
+        meta = json.load(f)
+    mode = 'r' if mmap else None
+    products = {}
+    for product in meta['products']:
+        arrays = {name: np.load(os.path.join(folder, f'{product}__{name}.npy'), mmap_mode=mode)
+                  for name in ['day', 'timestamp', 'mid_price'] + COLUMNS}
+        products[product] = ProductBook(product, arrays['day'], arrays['timestamp'],
+                                        {column: arrays[column] for column in COLUMNS}, arrays['mid_price'])
+    return DayBook(products)
+
+
+def load_book(path: str, cache_dir: str = None, mmap: bool = True) -> DayBook:
+    """
+    Load a price-level CSV through the columnar cache.
+
+    The first call parses the CSV and writes DayData/.book_cache/<name>/*.npy, later calls memory-map those files.
+    The cache is rebuilt whenever the CSV's size or mtime changes.
+
+    Args:
+        path (str): Price-level CSV.
+        cache_dir (str, optional): Where to keep caches. Defaults to a .book_cache folder next to the CSV.
+        mmap (bool, optional): Memory-map the arrays instead of reading them. Defaults to True.
+
+    Returns:
+        DayBook: Columnar book for the whole file.
+    """
+    folder = _cache_path(path, cache_dir)
+    meta = _source_meta(path)
+    meta_file = os.path.join(folder, 'meta.json')
+    if os.path.exists(meta_file):
+        with open(meta_file) as f:
+            cached = json.load(f)
+        if all(cached.get(key) == value for key, value in meta.items()):
+            return open_book(folder, mmap)
+    book = parse_csv(path)
+    save_book(book, folder, meta)
+    return book
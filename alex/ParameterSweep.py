@@ -0,0 +1,125 @@
+from typing import Any, Dict, List
+from Backtester import Backtester, build_caches, cached_ticks, cached_trader
+from Profiler import LatencyProfiler
+import argparse
+import ast
+import functools
+import inspect
+import itertools
+import multiprocessing
+import os
+import time
+import pandas as pd
+
+# Author: Alex Morrow
+# Grid search over Trader attributes (am_window_size, star_window_size, std multipliers, ...). Every
+# (parameter combo, day) pair is an independent backtest, so they are spread over a process pool.
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    {'a': [1, 2], 'b': [3]} -> [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def make_trader(trader_cls, params: Dict[str, Any]):
+    """
+    Instantiate trader_cls and override the given attributes after its __init__ ran.
+
+    The instance keeps its original class so jsonpickle'd traderData still decodes to the same Trader.
+
+    Raises:
+        ValueError: If a parameter is not an attribute of the Trader, so a misspelt grid key fails instead of
+            sweeping identical runs.
+    """
+    trader = trader_cls()
+    unknown = sorted(name for name in params if not hasattr(trader, name))
+    if unknown:
+        raise ValueError(f"{trader_cls.__name__} has no attributes {unknown}")
+    for name, value in params.items():
+        setattr(trader, name, value)
+    return trader
+
+
+def run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Backtest one parameter combo on one data file. Runs inside a worker process.
+    """
+    start = time.perf_counter()
+    factory = functools.partial(make_trader, cached_trader(job['strategy']), job['params'])
+    result = Backtester(factory, cached_ticks(job['data']), profiler=LatencyProfiler(enabled=False)).run()
+    row = dict(job['params'])
+    row['data'] = os.path.basename(job['data'])
+    row.update(result.summary_row(time.perf_counter() - start))
+    return row
+
+
+def sweep(strategy, grid: Dict[str, List[Any]], data: List[str], processes: int = None, out: str = None) -> pd.DataFrame:
+    """
+    Run every combination in grid on every data file across a process pool.
+
+    Args:
+        strategy: Strategy file path, or a Trader class loaded from one (its file is re-imported in each worker).
+        grid (Dict[str, List[Any]]): Trader attribute -> values to try.
+        data (List[str]): Price-level CSVs, one backtest per file per combo.
+        processes (int, optional): Pool size. Defaults to all cores.
+        out (str, optional): CSV path to write the results table to.
+
+    Returns:
+        pd.DataFrame: One row per (combo, file) with pnl, trades, max_position, max_drawdown and per-product pnl.
+
+    Raises:
+        ValueError: If a grid key is not an attribute of the Trader, checked once before the pool starts.
+    """
+    strategy = strategy if isinstance(strategy, str) else inspect.getfile(strategy)
+    strategy = os.path.abspath(strategy)
+    make_trader(cached_trader(strategy), {name: values[0] for name, values in grid.items() if values})
+    data = [os.path.abspath(path) for path in data]
+    build_caches(data)
+
+    jobs = [{'strategy': strategy, 'params': params, 'data': path} for params in expand_grid(grid) for path in data]
+    with multiprocessing.Pool(processes) as pool:
+        rows = pool.map(run_job, jobs, chunksize=max(1, len(jobs) // (4 * (processes or os.cpu_count() or 1))))
+
+    results = pd.DataFrame(rows)
+    if out:
+        results.to_csv(out, index=False)
+    return results
+
+
+def summarize(results: pd.DataFrame, params: List[str]) -> pd.DataFrame:
+    """
+    Aggregate the per-file rows into one row per combo, best total PnL first.
+    """
+    summary = results.groupby(params).agg(pnl=('pnl', 'sum'), worst_day=('pnl', 'min'), trades=('trades', 'sum'),
+                                          max_position=('max_position', 'max'), max_drawdown=('max_drawdown', 'max'))
+    return summary.sort_values('pnl', ascending=False).reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel parameter sweep of a Trader over price CSVs.')
+    parser.add_argument('strategy', help='Strategy file containing a Trader class')
+    parser.add_argument('--grid', nargs='+', required=True, help='name=v1,v2,... e.g. am_window_size=30,34,38')
+    parser.add_argument('--data', nargs='+', required=True, help='Price CSVs')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--out', default='sweep_results.csv')
+    args = parser.parse_args()
+
+    grid = {}
+    for spec in args.grid:
+        name, values = spec.split('=', 1)
+        grid[name] = [ast.literal_eval(value) for value in values.split(',')]
+
+    start = time.perf_counter()
+    try:
+        results = sweep(args.strategy, grid, args.data, args.processes, args.out)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"{len(results)} backtests in {time.perf_counter() - start:.1f}s, written to {args.out}")
+    print(summarize(results, list(grid)).head(20).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+from typing import Dict, Iterable, List, Mapping
+from datamodel import OrderDepth, Trade
+from OrderBookStore import SUBMISSION
+import pandas as pd
+
+# Author: Alex Morrow
+# Incremental position accounting. Every fill updates position, average cost and realized PnL in O(1), and marking
+# to a price gives unrealized PnL without walking the trade history. The same engine runs in the Backtester and
+# inside a Trader:
+#
+#   self.pnl = PnLEngine()
+#   ...
+#   self.pnl.update(state)          # once per run(), books the previous tick's own_trades and marks to mid
+#   self.pnl.total()                # realized + unrealized - fees over all products
+
+
+class ProductAccount:
+    """
+    Running position of one product against its average entry price.
+
+    Attributes:
+        position (int): Signed position.
+        avg_cost (float): Average price of the open position, 0 when flat.
+        realized (float): PnL locked in by closing trades.
+        fees (float): Conversion fees, tariffs and storage paid so far.
+        volume (int): Absolute quantity traded.
+        mark (float): Last price the position was marked at.
+    """
+
+    __slots__ = ('position', 'avg_cost', 'realized', 'fees', 'volume', 'mark')
+
+    def __init__(self):
+        self.position = 0
+        self.avg_cost = 0.0
+        self.realized = 0.0
+        self.fees = 0.0
+        self.volume = 0
+        self.mark = 0.0
+
+    def fill(self, price: float, quantity: int) -> None:
+        """
+        Book a fill of signed quantity (positive bought, negative sold) at price.
+        """
+        if quantity == 0:
+            return
+        self.volume += abs(quantity)
+        position = self.position
+        if position == 0 or (position > 0) == (quantity > 0):
+            # Opening or adding to the position
+            new_position = position + quantity
+            self.avg_cost = (self.avg_cost * position + price * quantity) / new_position
+            self.position = new_position
+            return
+        closed = min(abs(quantity), abs(position))
+        direction = 1 if position > 0 else -1
+        self.realized += direction * closed * (price - self.avg_cost)
+        self.position = position + quantity
+        if self.position == 0:
+            self.avg_cost = 0.0
+        elif (self.position > 0) != (position > 0):
+            # Flipped through flat, the remainder is a new position opened at this price
+            self.avg_cost = float(price)
+
+    def charge(self, amount: float) -> None:
+        """
+        Pay a cost that is not part of a fill price (transport fees, tariffs, storage).
+        """
+        self.fees += amount
+
+    @property
+    def unrealized(self) -> float:
+        return self.position * (self.mark - self.avg_cost) if self.position else 0.0
+
+    @property
+    def total(self) -> float:
+        return self.realized + self.unrealized - self.fees
+
+    def __getstate__(self):
+        return [self.position, self.avg_cost, self.realized, self.fees, self.volume, self.mark]
+
+    def __setstate__(self, state):
+        self.position, self.avg_cost, self.realized, self.fees, self.volume, self.mark = state
+
+
+class PnLEngine:
+    """
+    ProductAccounts for every product traded, plus optional per-tick history.
+
+    Args:
+        record (bool, optional): Keep a per-tick time series of every account for frame(). Leave off inside a Trader,
+            the history grows every tick and would end up in traderData.
+    """
+
+    def __init__(self, record: bool = False):
+        self.accounts: Dict[str, ProductAccount] = {}
+        self.record = record
+        self.last_timestamp = -1
+        self.history: Dict[str, List[tuple]] = {}
+
+    def account(self, product: str) -> ProductAccount:
+        account = self.accounts.get(product)
+        if account is None:
+            account = self.accounts[product] = ProductAccount()
+        return account
+
+    def fill(self, product: str, price: float, quantity: int) -> None:
+        self.account(product).fill(price, quantity)
+
+    def book_trades(self, trades: Iterable[Trade]) -> None:
+        """
+        Book our side of each trade. Trades where neither side is SUBMISSION are ignored.
+        """
+        for trade in trades:
+            if trade.buyer == SUBMISSION:
+                self.account(trade.symbol).fill(trade.price, trade.quantity)
+            elif trade.seller == SUBMISSION:
+                self.account(trade.symbol).fill(trade.price, -trade.quantity)
+
+    def convert(self, product: str, quantity: int, price: float, fees: float = 0.0) -> None:
+        """
+        Book a conversion of signed quantity (positive imports, i.e. buys from the other island) at price, e.g. the
+        ConversionObservation ask for imports or bid for exports, with transport fees and tariffs passed as fees.
+        """
+        account = self.account(product)
+        account.fill(price, quantity)
+        account.charge(fees)
+
+    def charge(self, product: str, amount: float) -> None:
+        self.account(product).charge(amount)
+
+    def mark(self, prices: Mapping[str, float], timestamp: int = None) -> None:
+        """
+        Mark each account to its price in prices (accounts missing from prices keep their last mark), and append
+        to the history when recording.
+        """
+        for product, price in prices.items():
+            if price is not None:
+                self.account(product).mark = price
+        if self.record and timestamp is not None:
+            for product, account in self.accounts.items():
+                self.history.setdefault(product, []).append(
+                    (timestamp, account.position, account.avg_cost, account.realized, account.unrealized, account.fees, account.volume))
+
+    def update(self, state) -> None:
+        """
+        Per-tick update from inside Trader.run: book the own_trades not seen yet and mark every product to its mid.
+
+        own_trades is the previous tick's fills, stamped with the tick they were placed at. Those from the last
+        update's tick onwards are new, so the same list is only booked once even if update is called more than once
+        per tick, whatever the tick step.
+        """
+        if state.timestamp <= self.last_timestamp:
+            return
+        for trades in state.own_trades.values():
+            self.book_trades(trade for trade in trades if self.last_timestamp <= trade.timestamp < state.timestamp)
+        self.last_timestamp = state.timestamp
+        self.mark({product: mid_price(depth) for product, depth in state.order_depths.items()}, state.timestamp)
+
+    def position(self, product: str) -> int:
+        account = self.accounts.get(product)
+        return account.position if account is not None else 0
+
+    def total(self, product: str = None) -> float:
+        if product is not None:
+            account = self.accounts.get(product)
+            return account.total if account is not None else 0.0
+        return sum(account.total for account in self.accounts.values())
+
+    def frame(self, product: str) -> pd.DataFrame:
+        """
+        Recorded time series of one product: timestamp, position, avg_cost, realized, unrealized, fees, volume, pnl.
+        """
+        frame = pd.DataFrame(self.history.get(product, []),
+                             columns=['timestamp', 'position', 'avg_cost', 'realized', 'unrealized', 'fees', 'volume'])
+        frame['pnl'] = frame['realized'] + frame['unrealized'] - frame['fees']
+        return frame
+
+    def __getstate__(self):
+        # History stays out of traderData
+        return {'accounts': self.accounts, 'last_timestamp': self.last_timestamp}
+
+    def __setstate__(self, state):
+        self.accounts = state['accounts']
+        self.last_timestamp = state['last_timestamp']
+        self.record = False
+        self.history = {}
+
+
+def mid_price(depth: OrderDepth) -> float:
+    """
+    OrderDepth.mid_price, or the only side present, None for an empty book.
+
+    OrderDepth.mid_price is None unless both sides are quoted, and mark keeps the last mark for a None. Marking to
+    the one side left keeps unrealized PnL moving with the book instead of going stale while a side is empty.
+    """
+    mid = depth.mid_price
+    if mid is not None:
+        return mid
+    return depth.best_bid if depth.best_bid is not None else depth.best_ask
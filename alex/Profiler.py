@@ -0,0 +1,173 @@
+from typing import Callable, Dict, List, Tuple
+from collections import defaultdict
+import functools
+import inspect
+import time
+import numpy as np
+import pandas as pd
+
+# Author: Alex Morrow
+# Per-tick latency instrumentation for Trader.run. Wrap the parts of a Trader in sections,
+#
+#   from Profiler import section, timed
+#   with section('decode'):
+#       saved_state = jsonpickle.decode(state.traderData)
+#   @timed('regression', product_arg='product')
+#   def calc_next_price_regression(self, product): ...
+#
+# and the Backtester closes one tick per run() call and reports p50/p99/max per section and product.
+
+RUN_SECTION = 'run'
+BUDGET_MS = 900     # Exchange time limit per run() call
+
+
+class _NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Section:
+    __slots__ = ('profiler', 'key', 'start')
+
+    def __init__(self, profiler: 'LatencyProfiler', key: Tuple[str, str]):
+        self.profiler = profiler
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.current[self.key] += time.perf_counter() - self.start
+        return False
+
+
+class LatencyProfiler:
+    """
+    Collects wall time per (section, product) per tick.
+
+    Time spent in a section is summed within a tick, so a section entered once per product or several times per
+    tick shows up as its total for that tick.
+
+    Attributes:
+        enabled (bool): When False, section() returns a shared no-op and nothing is recorded.
+        ticks (List[Tuple[int, Dict[Tuple[str, str], float]]]): (timestamp, seconds per (section, product)) per tick.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.current: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.ticks: List[Tuple[int, Dict[Tuple[str, str], float]]] = []
+        self._null = _NullSection()
+
+    def section(self, name: str, product: str = ''):
+        """
+        Context manager timing the enclosed block under (name, product).
+        """
+        if not self.enabled:
+            return self._null
+        return _Section(self, (name, product or ''))
+
+    def timed(self, name: str, product_arg: str = None) -> Callable:
+        """
+        Decorator timing every call of a function under `name`.
+
+        Args:
+            name (str): Section name.
+            product_arg (str, optional): Name of the function parameter holding the product, to split by product.
+        """
+        return _timed(lambda: self, name, product_arg)
+
+    def end_tick(self, timestamp: int, run_seconds: float = None) -> None:
+        """
+        Close the current tick. Called by the Backtester after every run(), with run()'s total wall time.
+        """
+        if not self.enabled:
+            return
+        if run_seconds is not None:
+            self.current[(RUN_SECTION, '')] += run_seconds
+        self.ticks.append((timestamp, dict(self.current)))
+        self.current = defaultdict(float)
+
+    def reset(self) -> None:
+        self.current = defaultdict(float)
+        self.ticks = []
+
+    def report(self, budget_ms: float = BUDGET_MS) -> pd.DataFrame:
+        """
+        Returns:
+            pd.DataFrame: One row per (section, product) with ticks, mean/p50/p99/max in ms, the worst tick's share of
+            the run() budget and its timestamp, slowest p99 first.
+        """
+        samples: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        worst: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        for timestamp, sections in self.ticks:
+            for key, seconds in sections.items():
+                samples[key].append(seconds)
+                if seconds > worst.get(key, (-1.0, 0))[0]:
+                    worst[key] = (seconds, timestamp)
+
+        rows = []
+        for (name, product), values in samples.items():
+            ms = 1000 * np.asarray(values)
+            rows.append({'section': name, 'product': product, 'ticks': len(ms), 'mean_ms': ms.mean(),
+                         'p50_ms': np.percentile(ms, 50), 'p99_ms': np.percentile(ms, 99), 'max_ms': ms.max(),
+                         'max_budget_pct': 100 * ms.max() / budget_ms, 'worst_timestamp': worst[(name, product)][1]})
+        columns = ['section', 'product', 'ticks', 'mean_ms', 'p50_ms', 'p99_ms', 'max_ms', 'max_budget_pct', 'worst_timestamp']
+        return pd.DataFrame(rows, columns=columns).sort_values('p99_ms', ascending=False).reset_index(drop=True)
+
+
+def _timed(resolve: Callable[[], LatencyProfiler], name: str, product_arg: str = None) -> Callable:
+    """
+    Decorator timing every call under `name` on the profiler resolve() returns at call time.
+    """
+    def decorator(fn):
+        index = None
+        if product_arg is not None:
+            index = list(inspect.signature(fn).parameters).index(product_arg)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler = resolve()
+            if not profiler.enabled:
+                return fn(*args, **kwargs)
+            product = ''
+            if index is not None:
+                product = kwargs[product_arg] if product_arg in kwargs else (args[index] if index < len(args) else '')
+            with profiler.section(name, product):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Shared instance, so Trader code and the Backtester see the same profiler without passing it around
+PROFILER = LatencyProfiler()
+_active = PROFILER
+
+
+def activate(profiler: LatencyProfiler) -> LatencyProfiler:
+    """
+    Route the module-level section() and timed() to profiler, e.g. for the length of one Backtester.run. Returns
+    the previously active profiler so it can be restored.
+    """
+    global _active
+    previous, _active = _active, profiler
+    return previous
+
+
+def section(name: str, product: str = ''):
+    """
+    section() of the active profiler, PROFILER unless a Backtester run has activated its own.
+    """
+    return _active.section(name, product)
+
+
+def timed(name: str, product_arg: str = None) -> Callable:
+    """
+    timed() of the active profiler, resolved on every call so functions decorated at import time follow
+    activate().
+    """
+    return _timed(lambda: _active, name, product_arg)
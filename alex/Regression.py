@@ -0,0 +1,229 @@
+from typing import Dict, Hashable, Sequence
+from Smoothing import FFTSmoother
+import numpy as np
+
+# Author: Alex Morrow
+# Fixed-window regression predictors for the regression-driven products (STARFRUIT, CHOCOLATE, ...).
+
+
+class PolynomialPredictor:
+    """
+    Least-squares polynomial extrapolation over a fixed window, as one dot product per prediction.
+
+    calc_next_price_regression fits np.polyfit(range(n), window, degree) every tick and evaluates the polynomial at
+    t = n + horizon. The fitted coefficients are pinv(V) @ y for the fixed Vandermonde matrix V of range(n), so the
+    prediction is (row of powers of t) @ pinv(V) @ y. That row vector only depends on n, degree and horizon and is
+    computed once per window length. Use one predictor per product, the per-tick cache is not keyed by product.
+
+    Args:
+        degree (int): Polynomial degree, 4 in the current Traders.
+        horizon (float): How far past the last index to extrapolate, relative to len(window). The Traders use
+            window_size / 4.
+        smoothing (float, optional): SMOOTHING of the smooth_data step the Traders run before the fit. The FFT
+            smoothing is linear too, so it is folded into the same weight vector and costs nothing per tick.
+    """
+
+    def __init__(self, degree: int, horizon: float, smoothing: float = None):
+        self.degree = degree
+        self.horizon = horizon
+        self.smoothing = smoothing
+        self._smoother = FFTSmoother() if smoothing is not None else None
+        self._weights: Dict[int, np.ndarray] = {}
+        self._tick = None
+        self._cached = None
+
+    def weights(self, n: int) -> np.ndarray:
+        w = self._weights.get(n)
+        if w is None:
+            vander = np.vander(np.arange(n, dtype=np.float64), self.degree + 1)
+            t_powers = np.vander(np.array([n + self.horizon], dtype=np.float64), self.degree + 1)[0]
+            w = t_powers @ np.linalg.pinv(vander)
+            if self._smoother is not None:
+                w = w @ self._smoother.matrix(n, self.smoothing)
+            self._weights[n] = w
+        return w
+
+    def predict(self, values: Sequence[float], tick: Hashable = None) -> float:
+        """
+        Predicted value at len(values) + horizon.
+
+        Args:
+            values (Sequence[float]): The window, oldest first.
+            tick (Hashable, optional): E.g. state.timestamp. When given, repeated calls with the same tick return the
+                first result without recomputing, so the lower and upper band can both call predict.
+        """
+        if tick is not None and tick == self._tick:
+            return self._cached
+        prediction = float(self.weights(len(values)) @ np.asarray(values, dtype=np.float64))
+        if tick is not None:
+            self._tick, self._cached = tick, prediction
+        return prediction
+
+
+class RollingRidge:
+    """
+    Online Trader.rolling_linear_regression_with_reg for several series at once (e.g. sunlight and humidity).
+
+    For each series the original fits y = b0 + b1 * x by ridge regression on the last `window` values, with x and
+    y both the window itself, then returns b0 + b1 * data[j - 1] for the last `window` indices j. The normal
+    equations only need n, sum(x) and sum(x^2) over the window, which are updated with the value entering and the
+    value leaving (rank-one update/downdate), and every 2x2 system is solved in closed form for all series together.
+
+    Args:
+        names (List[str]): Series names, in the order values are pushed.
+        window (int): num_rows in the original.
+        lambda_reg (float, optional): Ridge penalty. Defaults to 0.01.
+    """
+
+    REFRESH = 1000  # Recompute the sums from the buffer every REFRESH pushes to shed rounding drift
+
+    def __init__(self, names: Sequence[str], window: int, lambda_reg: float = 0.01):
+        self.names = list(names)
+        self.window = window
+        self.lambda_reg = lambda_reg
+        # Last window + 1 values per series, the extra one is data[len - window - 1] used by the first prediction
+        self._buffer = np.zeros((len(self.names), window + 1))
+        self._head = 0
+        self._count = 0
+        self._sum = np.zeros(len(self.names))
+        self._sum_sq = np.zeros(len(self.names))
+
+    def push(self, values: Sequence[float]) -> None:
+        """
+        Add the newest value of every series, in the order of names.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        size = self.window + 1
+        if self._count >= self.window:
+            leaving = self._buffer[:, (self._head - self.window) % size]
+            self._sum -= leaving
+            self._sum_sq -= leaving * leaving
+        self._buffer[:, self._head] = values
+        self._head = (self._head + 1) % size
+        self._count += 1
+        self._sum += values
+        self._sum_sq += values * values
+        if self._count % self.REFRESH == 0:
+            window = self._window()
+            self._sum, self._sum_sq = window.sum(axis=1), (window * window).sum(axis=1)
+
+    def _window(self) -> np.ndarray:
+        idx = (self._head - min(self._count, self.window) + np.arange(min(self._count, self.window))) % (self.window + 1)
+        return self._buffer[:, idx]
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.window
+
+    def coefficients(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: (series, 2) ridge coefficients [b0, b1].
+        """
+        n, lam = self.window, self.lambda_reg
+        a11, a12, a22 = n + lam, self._sum, self._sum_sq + lam
+        det = a11 * a22 - a12 * a12
+        # X^T y = [sum(x), sum(x^2)] since the target is the window itself
+        b0 = (a22 * self._sum - a12 * self._sum_sq) / det
+        b1 = (a11 * self._sum_sq - a12 * self._sum) / det
+        return np.stack([b0, b1], axis=1)
+
+    def predict(self) -> Dict[str, np.ndarray]:
+        """
+        Same values as rolling_linear_regression_with_reg(name, lambda_reg, window) for every series.
+        """
+        if not self.ready:
+            return {name: np.full(self.window, np.nan) for name in self.names}
+        beta = self.coefficients()
+        size = self.window + 1
+        if self._count > self.window:
+            lagged = (self._head - size + np.arange(self.window)) % size
+        else:
+            # Exactly window values seen: the original's first data[j - 1] is data[-1], the newest value
+            lagged = (self._head - self.window - 1 + np.arange(self.window)) % size
+            lagged[0] = (self._head - 1) % size
+        x = self._buffer[:, lagged]
+        predictions = beta[:, :1] + beta[:, 1:] * x
+        return dict(zip(self.names, predictions))
+
+    def predict_next(self) -> Dict[str, float]:
+        """
+        Only the last prediction per series, in O(1).
+        """
+        if not self.ready:
+            return {name: np.nan for name in self.names}
+        beta = self.coefficients()
+        x = self._buffer[:, (self._head - 2) % (self.window + 1)]
+        if self.window == 1 and self._count == 1:
+            x = self._buffer[:, (self._head - 1) % 2]
+        return dict(zip(self.names, (beta[:, 0] + beta[:, 1] * x).tolist()))
+
+
+def check_polynomial(ticks: int = 2000, window: int = 8, seed: int = 0):
+    """
+    Replay a random STARFRUIT-like walk through Round3.Trader.calc_next_price_regression and PolynomialPredictor.
+
+    Returns:
+        Tuple[float, int, int]: Largest absolute difference from np.polyfit on the Trader's smoothed window, ticks
+        where the rounded predictions differ away from a tie, and ticks where they differ on an exact .5. Mids move
+        in half ticks, so the prediction often lands on .5 and round() to even then follows the last bits of either
+        fit; those ties are counted apart.
+    """
+    import warnings
+    from Round3 import Trader
+    rng = np.random.default_rng(seed)
+    prices = (5000 + np.cumsum(rng.integers(-6, 7, ticks)) / 2).tolist()
+    trader = Trader()
+    trader.star_window_size = window
+    predictor = PolynomialPredictor(4, window / 4, smoothing=0.99)
+    worst, mismatches, ties = 0.0, 0, 0
+    for i in range(window, ticks + 1):
+        trader.star_cache = prices[i - window:i]
+        smoothed = np.real(np.array(trader.smooth_data(trader.star_cache, 0.99)))
+        reference = np.polyval(np.polyfit(range(window), smoothed, 4), window + window / 4)
+        prediction = predictor.predict(trader.star_cache, i)
+        worst = max(worst, abs(prediction - reference))
+        with warnings.catch_warnings():
+            # The Trader rounds the complex output of its FFT smoothing, numpy warns about dropping the imaginary part
+            warnings.simplefilter('ignore')
+            rounded = trader.calc_next_price_regression()
+        if int(round(prediction)) != rounded:
+            if abs(reference - np.floor(reference) - 0.5) < 1e-6:
+                ties += 1
+            else:
+                mismatches += 1
+    return worst, mismatches, ties
+
+
+def check_ridge(ticks: int = 2000, window: int = 10, seed: int = 0) -> float:
+    """
+    Largest absolute difference between RollingRidge and OrchidIsland.Trader.rolling_linear_regression_with_reg on
+    random sunlight/humidity series, over every prediction of every tick.
+    """
+    from OrchidIsland import Trader
+    rng = np.random.default_rng(seed)
+    series = {'sunlight': 2500 + np.cumsum(rng.normal(0, 5, ticks)), 'humidity': 80 + np.cumsum(rng.normal(0, 0.1, ticks))}
+    trader = Trader()
+    ridge = RollingRidge(list(series), window)
+    worst = 0.0
+    for i in range(ticks):
+        for name, values in series.items():
+            trader.orchid_data_dict[name].append(float(values[i]))
+        ridge.push([values[i] for values in series.values()])
+        if not ridge.ready:
+            continue
+        predictions, last = ridge.predict(), ridge.predict_next()
+        for name in series:
+            reference = trader.rolling_linear_regression_with_reg(name, 0.01, window)
+            worst = max(worst, float(np.max(np.abs(predictions[name] - np.asarray(reference)))), abs(last[name] - reference[-1]))
+    return worst
+
+
+if __name__ == '__main__':
+    error, mismatches, ties = check_polynomial()
+    print(f"PolynomialPredictor: max abs difference vs np.polyfit {error:.3e}, rounded predictions differ from Round3 "
+          f"on {mismatches} ticks ({ties} more on exact .5 ties)")
+    assert error < 1e-8 and mismatches == 0, "PolynomialPredictor does not match calc_next_price_regression"
+    error = check_ridge()
+    print(f"RollingRidge: max abs difference vs rolling_linear_regression_with_reg {error:.3e}")
+    assert error < 1e-6, "RollingRidge does not match rolling_linear_regression_with_reg"
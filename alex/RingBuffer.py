@@ -0,0 +1,115 @@
+from typing import Iterator, List, Optional
+from array import array
+import json
+
+# Author: Alex Morrow
+# Fixed-capacity price history for Trader state. Replaces the unbounded lists (star_historical_bid_prices,
+# basket_mid_prices, spread, orchid_data_dict columns, ...) so traderData stays the same size all day.
+# Standard library only, so it can be pasted into a submission file.
+
+
+class RingBuffer:
+    """
+    Array-backed ring buffer holding the last `capacity` floats.
+
+    Behaves like the history lists it replaces for reading (len, indexing incl. negatives and slices, iteration
+    oldest to newest) while appending in O(1) with no pop(0). Pickles (and jsonpickles) to just the capacity and
+    the live values, oldest first, so a full window costs the same number of bytes at tick 10 and tick 10000.
+
+    Args:
+        capacity (int): Number of values kept, usually the strategy's window size.
+        values (Iterable[float], optional): Initial values, only the last `capacity` are kept.
+    """
+
+    def __init__(self, capacity: int, values=()):
+        if capacity <= 0:
+            raise ValueError(f"RingBuffer capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self._data = array('d', bytes(8 * capacity))
+        self._head = 0   # Next write position, also the oldest value once full
+        self._count = 0
+        for value in values:
+            self.append(value)
+
+    def append(self, value: float) -> Optional[float]:
+        """
+        Add the newest value.
+
+        Returns:
+            Optional[float]: The value evicted to make room, None while the buffer is still filling.
+        """
+        evicted = self._data[self._head] if self._count == self.capacity else None
+        self._data[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        return evicted
+
+    def extend(self, values) -> None:
+        for value in values:
+            self.append(value)
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+
+    @property
+    def full(self) -> bool:
+        return self._count == self.capacity
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _index(self, i: int) -> int:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError('RingBuffer index out of range')
+        return (self._head - self._count + i) % self.capacity
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.to_list()[i]
+        return self._data[self._index(i)]
+
+    def __iter__(self) -> Iterator[float]:
+        start = self._head - self._count
+        for i in range(self._count):
+            yield self._data[(start + i) % self.capacity]
+
+    def __repr__(self) -> str:
+        return f"RingBuffer({self.capacity}, {self.to_list()})"
+
+    def to_list(self) -> List[float]:
+        """
+        Values oldest first.
+        """
+        if self._count < self.capacity:
+            return self._data[:self._count].tolist()
+        return (self._data[self._head:] + self._data[:self._head]).tolist()
+
+    # Serialization ---------------------------------------------------------------------------------------------
+
+    def to_state(self) -> List:
+        """
+        Compact JSON-able form: [capacity, v_oldest, ..., v_newest], with integral prices written as ints.
+        """
+        return [self.capacity] + [int(v) if v.is_integer() else v for v in self.to_list()]
+
+    @classmethod
+    def from_state(cls, state: List) -> 'RingBuffer':
+        return cls(int(state[0]), state[1:])
+
+    def encode(self) -> str:
+        return json.dumps(self.to_state(), separators=(',', ':'))
+
+    @classmethod
+    def decode(cls, data: str) -> 'RingBuffer':
+        return cls.from_state(json.loads(data))
+
+    def __getstate__(self):
+        return {'s': self.to_state()}
+
+    def __setstate__(self, state):
+        values = state['s']
+        self.__init__(int(values[0]), values[1:])
@@ -0,0 +1,88 @@
+from typing import List, Tuple
+from RingBuffer import RingBuffer
+import math
+
+# Author: Alex Morrow
+# Constant time rolling mean/std for the Bollinger band strategies. Only uses the standard library (plus RingBuffer)
+# so it can be pasted straight into a submission file next to the Trader.
+
+
+class RollingStats:
+    """
+    Rolling mean and standard deviation over the last `window` values, updated in O(1) per value.
+
+    Keeps a fixed ring buffer of the window plus a running mean and sum of squared deviations (Welford's update,
+    extended to drop the value leaving the window), so it never rescans history. Matches
+    pd.Series(history).rolling(window).mean()/.std() at the last index with the default ddof=1; pass ddof=0 for
+    np.std.
+
+    Args:
+        window (int): Number of values in the window.
+        ddof (int, optional): Delta degrees of freedom for std. Defaults to 1 like pandas.
+    """
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.window = window
+        self.ddof = ddof
+        self.values = RingBuffer(window)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, x: float) -> None:
+        """
+        Add the newest value, evicting the oldest once the window is full.
+        """
+        x = float(x)
+        old = self.values.append(x)
+        if old is None:
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+        else:
+            old_mean = self.mean
+            self.mean += (x - old) / self.window
+            self.m2 += (x - old) * (x - self.mean + old - old_mean)
+            if self.m2 < 0:     # Rounding can push a flat window slightly negative
+                self.m2 = 0.0
+
+    @property
+    def ready(self) -> bool:
+        """
+        True once the window is full, before that pandas' rolling() would return NaN.
+        """
+        return self.count == self.window
+
+    @property
+    def std(self) -> float:
+        if self.count <= self.ddof:
+            return math.nan
+        return math.sqrt(self.m2 / (self.count - self.ddof))
+
+    def bollinger(self, k: float) -> Tuple[float, float, float]:
+        """
+        Returns:
+            Tuple[float, float, float]: (lower band, mean, upper band) with the bands k standard deviations away.
+        """
+        std = self.std
+        return self.mean - k * std, self.mean, self.mean + k * std
+
+    def last(self) -> float:
+        return self.values[-1] if self.count else math.nan
+
+    def to_list(self) -> List[float]:
+        """
+        Window contents, oldest first.
+        """
+        return self.values.to_list()
+
+    def __getstate__(self):
+        # Only the window is stored, the running sums are rebuilt on load which also clears any accumulated drift
+        return {'d': self.ddof, 's': self.values.to_state()}
+
+    def __setstate__(self, state):
+        values = RingBuffer.from_state(state['s'])
+        self.__init__(values.capacity, state['d'])
+        for x in values:
+            self.push(x)
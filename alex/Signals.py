@@ -0,0 +1,209 @@
+from typing import Dict, Tuple
+from Basket import BASKET_WEIGHTS
+from OrderBookStore import DayBook, ProductBook
+from RollingStats import RollingStats
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Author: Alex Morrow
+# Whole-day versions of the signals the Traders compute tick by tick, as NumPy arrays over a DayBook:
+#
+#   book = load_book('DayData/Day_0.csv')
+#   bid, ask = best_bid(book.products['STARFRUIT']), best_ask(book.products['STARFRUIT'])
+#   lower, mean, upper = bollinger(bid, window=37, k=1.6)          # Sam/3xxStrategy, ddof=1 like pandas
+#   imbalance = order_book_imbalance(book.products['STARFRUIT'])   # OldStrats/OB_Imbalances
+#   spread = basket_spread(book, BASKET_WEIGHTS, 'GIFT_BASKET')     # Round3.check_arbitrage_opportunity
+#   z = zscore(spread, 48)
+#
+# Element i is the value the online Trader would see after tick i, NaN until its window is full and on ticks it
+# skips. check_online() replays the online implementations over a day and asserts they agree at every tick.
+
+def best_bid(book: ProductBook) -> np.ndarray:
+    """
+    Best bid per row of a product, NaN where the bid side is empty.
+    """
+    return np.where(book.bid_volume[:, 0] > 0, book.bid_price[:, 0], np.nan)
+
+
+def best_ask(book: ProductBook) -> np.ndarray:
+    """
+    Best ask per row of a product, NaN where the ask side is empty.
+    """
+    return np.where(book.ask_volume[:, 0] > 0, book.ask_price[:, 0], np.nan)
+
+
+def mid(book: ProductBook) -> np.ndarray:
+    """
+    (best bid + best ask) / 2 per row, NaN unless both sides are quoted.
+    """
+    return (best_bid(book) + best_ask(book)) / 2
+
+
+def by_tick(day: DayBook, product: str, values: np.ndarray) -> np.ndarray:
+    """
+    Reindex a per-row array of one product onto the day's ticks, NaN where the product has no row.
+    """
+    rows = day.rows[product]
+    return np.where(rows >= 0, np.asarray(values, dtype=np.float64)[np.maximum(rows, 0)], np.nan)
+
+
+def rolling_mean_std(x: np.ndarray, window: int, ddof: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trailing mean and std over `window` values, NaN until the window is full. ddof=1 matches
+    pd.Series.rolling().std(), ddof=0 matches np.std on the last `window` values.
+
+    NaN entries are ticks the Trader skips: the windows run over the other values only and the result is NaN there,
+    so the output still lines up with x.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    valid = ~np.isnan(x)
+    values = x[valid]
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window)
+        mean[window - 1:] = windows.mean(axis=1)
+        std[window - 1:] = windows.std(axis=1, ddof=ddof)
+    if len(values) == len(x):
+        return mean, std
+    full_mean, full_std = np.full(len(x), np.nan), np.full(len(x), np.nan)
+    full_mean[valid], full_std[valid] = mean, std
+    return full_mean, full_std
+
+
+def bollinger(x: np.ndarray, window: int, k: float, ddof: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (lower band, mean, upper band), as RollingStats.bollinger per tick.
+    """
+    mean, std = rolling_mean_std(x, window, ddof)
+    return mean - k * std, mean, mean + k * std
+
+
+def zscore(x: np.ndarray, window: int, ddof: int = 0) -> np.ndarray:
+    """
+    (x - rolling mean) / rolling std over the trailing window, ddof=0 like the np.std in Round3.
+    """
+    mean, std = rolling_mean_std(x, window, ddof)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (np.asarray(x, dtype=np.float64) - mean) / std
+
+
+def order_book_imbalance(book: ProductBook) -> np.ndarray:
+    """
+    (total bid volume - total ask volume) / total volume over all levels per row, 0 for an empty book.
+    """
+    bids = book.bid_volume.sum(axis=1).astype(np.float64)
+    asks = book.ask_volume.sum(axis=1).astype(np.float64)
+    total = bids + asks
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total == 0, 0.0, (bids - asks) / total)
+
+
+def basket_spread(day: DayBook, weights: Dict[str, float], basket: str) -> np.ndarray:
+    """
+    Basket mid minus the weighted sum of component mids at every tick, i.e. the series Round3 appends to
+    self.spread. Ticks missing a leg are NaN, the Trader skips them and so do rolling_mean_std and zscore.
+    """
+    total = by_tick(day, basket, mid(day.products[basket]))
+    for product, weight in weights.items():
+        total = total - weight * by_tick(day, product, mid(day.products[product]))
+    return total
+
+
+def synthetic_basket_day(ticks: int = 2000, seed: int = 0, gaps: float = 0.0) -> DayBook:
+    """
+    Random-walk book for the basket products, for checks when no round 3 price file is at hand. A `gaps` fraction
+    of each product's rows has an empty ask side.
+    """
+    rng = np.random.default_rng(seed)
+    timestamp = np.arange(ticks, dtype=np.int64) * 100
+    day = np.full(ticks, 3, dtype=np.int64)
+    starts = {'CHOCOLATE': 8000, 'STRAWBERRIES': 4000, 'ROSES': 14500}
+    mids = {product: start + np.cumsum(rng.integers(-2, 3, ticks)) for product, start in starts.items()}
+    mids['GIFT_BASKET'] = sum(BASKET_WEIGHTS[p] * mids[p] for p in starts) + 380 + np.cumsum(rng.integers(-3, 4, ticks))
+    products = {}
+    for product, centre in mids.items():
+        half = rng.integers(1, 4, (ticks, 1))
+        levels = {
+            'bid_price': centre[:, None] - half - np.arange(3),
+            'ask_price': centre[:, None] + half + np.arange(3),
+            'bid_volume': rng.integers(0, 30, (ticks, 3)),
+            'ask_volume': rng.integers(0, 30, (ticks, 3)),
+        }
+        levels['bid_volume'][:, 0] += 1
+        levels['ask_volume'][:, 0] += 1
+        empty = rng.random(ticks) < gaps
+        levels['ask_volume'][empty] = 0
+        levels['ask_price'][empty] = 0
+        products[product] = ProductBook(product, day, timestamp, levels, centre.astype(np.float64))
+    return DayBook(products)
+
+
+def check_online(day: DayBook, product: str, window: int = 37, k: float = 1.6, basket_window: int = 48) -> Dict[str, float]:
+    """
+    Replay the online computations tick by tick and return the largest absolute difference from the vectorized
+    arrays for each signal. The basket check runs when the day has all the basket products.
+    """
+    errors = {}
+    pbook = day.products[product]
+
+    # Bollinger on best bids, RollingStats vs bollinger()
+    bids = best_bid(pbook)
+    bids = bids[~np.isnan(bids)]
+    lower, mean, upper = bollinger(bids, window, k)
+    stats, worst = RollingStats(window), 0.0
+    for i, x in enumerate(bids.tolist()):
+        stats.push(x)
+        if stats.ready:
+            online = stats.bollinger(k)
+            worst = max(worst, abs(online[0] - lower[i]), abs(online[1] - mean[i]), abs(online[2] - upper[i]))
+        elif not np.isnan(mean[i]):
+            worst = np.inf
+    errors['bollinger'] = worst
+
+    # Imbalance, OB_Imbalances.calculate_order_book_imbalance on the OrderDepth the Trader sees
+    vectorized, worst = order_book_imbalance(pbook), 0.0
+    for row in range(len(pbook)):
+        bid_levels, ask_levels = pbook.levels(row)
+        buy, sell = sum(v for _, v in bid_levels), sum(v for _, v in ask_levels)
+        online = 0 if buy + sell == 0 else (buy - sell) / (buy + sell)
+        worst = max(worst, abs(online - vectorized[row]))
+    errors['imbalance'] = worst
+
+    # Basket spread and its z-score, Round3's np.mean/np.std over the last 48 spreads
+    if all(name in day.products for name in list(BASKET_WEIGHTS) + ['GIFT_BASKET']):
+        spread = basket_spread(day, BASKET_WEIGHTS, 'GIFT_BASKET')
+        z = zscore(spread, basket_window)
+        history, worst = [], 0.0
+        if len(spread) != len(day):
+            worst = np.inf
+        for i, value in enumerate(spread.tolist()):
+            if np.isnan(value):
+                # A skipped tick has no z-score
+                if not np.isnan(z[i]):
+                    worst = np.inf
+                continue
+            history.append(value)
+            if len(history) >= basket_window:
+                std = np.std(history[-basket_window:])
+                online = (history[-1] - np.mean(history[-basket_window:])) / std if std > 0 else np.nan
+                if not (np.isnan(online) and np.isnan(z[i])):
+                    worst = max(worst, abs(online - z[i]))
+        errors['basket_zscore'] = worst
+    return errors
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from OrderBookStore import load_book
+    path, product = (sys.argv[1], sys.argv[2]) if len(sys.argv) > 2 else ('DayData/Day_0.csv', 'STARFRUIT')
+    day = load_book(path)
+    start = time.perf_counter()
+    bollinger(best_bid(day.products[product]), 37, 1.6)
+    order_book_imbalance(day.products[product])
+    print(f"{path} {product}: vectorized signals in {1000 * (time.perf_counter() - start):.1f} ms")
+    for name, error in list(check_online(day, product).items()) + list(check_online(synthetic_basket_day(gaps=0.02), 'GIFT_BASKET').items()):
+        print(f"{name}: max abs difference vs online {error:.3e}")
+        assert error < 1e-6, f"{name} does not match the online implementation"
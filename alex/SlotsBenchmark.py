@@ -0,0 +1,69 @@
+from datamodel import Order, OrderBatch, OrderDepth, Trade
+import gc
+import time
+import tracemalloc
+
+# Author: Alex Morrow
+# Memory and construction time of datamodel's slotted Order, Trade and OrderDepth against the plain __dict__ classes
+# they replaced, and of filling an OrderBatch. Kept out of datamodel.py, which mirrors the platform's file.
+
+
+def benchmark(n: int = 200000) -> None:
+    """
+    Print bytes and nanoseconds per object for n of each object the Backtester creates every tick.
+    """
+    class DictOrder:
+        def __init__(self, symbol, price, quantity):
+            self.symbol = symbol
+            self.price = price
+            self.quantity = quantity
+
+    class DictTrade:
+        def __init__(self, symbol, price, quantity, buyer=None, seller=None, timestamp=0):
+            self.symbol = symbol
+            self.price = price
+            self.quantity = quantity
+            self.buyer = buyer
+            self.seller = seller
+            self.timestamp = timestamp
+
+    class DictOrderDepth:
+        def __init__(self):
+            self.buy_orders = {}
+            self.sell_orders = {}
+            self._ladders = None
+
+    cases = [
+        ('Order', lambda i: DictOrder('STARFRUIT', 5000 + i % 7, 1), lambda i: Order('STARFRUIT', 5000 + i % 7, 1)),
+        ('Trade', lambda i: DictTrade('STARFRUIT', 5000, 1, 'SUBMISSION', '', i), lambda i: Trade('STARFRUIT', 5000, 1, 'SUBMISSION', '', i)),
+        ('OrderDepth', lambda i: DictOrderDepth(), lambda i: OrderDepth()),
+    ]
+    for name, old, new in cases:
+        line = f"{name:<11}"
+        for label, make in (('__dict__', old), ('__slots__', new)):
+            tracemalloc.start()
+            objects = [make(i) for i in range(n)]
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del objects
+            elapsed = float('inf')
+            gc.disable()
+            for _ in range(3):
+                start = time.perf_counter()
+                objects = [make(i) for i in range(n)]
+                elapsed = min(elapsed, time.perf_counter() - start)
+                del objects
+            gc.enable()
+            line += f"  {label} {memory / n:6.1f} B/obj {1e9 * elapsed / n:6.1f} ns/obj"
+        print(line)
+
+    start = time.perf_counter()
+    batch = OrderBatch('STARFRUIT')
+    for i in range(n):
+        batch.append(5000 + i % 7, 1)
+    batch_time = time.perf_counter() - start
+    print(f"OrderBatch   {1e9 * batch_time / n:6.1f} ns/order, {(batch.prices.itemsize + batch.quantities.itemsize)} B/order")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,94 @@
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+# Author: Alex Morrow
+# Low-pass FFT smoothing shared by the regression Traders (smooth_data in Round3/CombinedStrat/Components,
+# filter in rick/res.py and rick/410.py).
+
+
+def smooth_data_reference(z: List, SMOOTHING) -> List:
+    """
+    The smooth_data/filter implementation the Traders carry, kept verbatim for equivalence checks.
+    """
+    z_doubled = z
+
+    z_fft = np.fft.fft(z_doubled)
+    n = len(z_doubled)
+    filter = []
+    for i in range(n):
+        if i < (n / 2) * (1 - SMOOTHING) or i > (n / 2) * (1 + SMOOTHING):
+            filter.append(1)
+        else:
+            filter.append(0)
+    z_smoothed = np.fft.ifft(z_fft * filter)
+    z1 = list(z_smoothed.flatten())
+    return z1
+
+
+class FFTSmoother:
+    """
+    smooth_data with the mask cached per (n, SMOOTHING) and a real FFT.
+
+    smooth_data keeps bins i < n/2 * (1 - SMOOTHING) or i > n/2 * (1 + SMOOTHING) of the full complex FFT. That mask
+    is not conjugate-symmetric, so its output is complex, and the Traders only ever use the real part (polyfit and
+    int(round(...)) drop the imaginary part). For a real input the real part of ifft(M * fft(z)) equals
+    ifft(M_sym * fft(z)) with M_sym[k] = (M[k] + M[-k]) / 2, which is exactly what rfft/irfft compute with half the
+    work. smooth() therefore returns np.real(smooth_data(z, SMOOTHING)) as a float array.
+    """
+
+    def __init__(self):
+        self._masks: Dict[Tuple[int, float], np.ndarray] = {}
+        self._matrices: Dict[Tuple[int, float], np.ndarray] = {}
+
+    def mask(self, n: int, smoothing: float) -> np.ndarray:
+        """
+        Symmetrised rfft mask of length n // 2 + 1.
+        """
+        key = (n, smoothing)
+        mask = self._masks.get(key)
+        if mask is None:
+            i = np.arange(n)
+            full = ((i < (n / 2) * (1 - smoothing)) | (i > (n / 2) * (1 + smoothing))).astype(np.float64)
+            half = np.arange(n // 2 + 1)
+            mask = self._masks[key] = (full[half] + full[(n - half) % n]) / 2
+        return mask
+
+    def smooth(self, z: Sequence[float], smoothing: float) -> np.ndarray:
+        z = np.asarray(z, dtype=np.float64)
+        n = len(z)
+        return np.fft.irfft(np.fft.rfft(z) * self.mask(n, smoothing), n)
+
+    def matrix(self, n: int, smoothing: float) -> np.ndarray:
+        """
+        The smoothing as an (n, n) matrix S with smooth(z) == S @ z, for folding into other linear predictors.
+        """
+        key = (n, smoothing)
+        matrix = self._matrices.get(key)
+        if matrix is None:
+            identity = np.eye(n)
+            matrix = self._matrices[key] = np.fft.irfft(np.fft.rfft(identity, axis=0) * self.mask(n, smoothing)[:, None], n, axis=0)
+        return matrix
+
+
+def check_equivalence(trials: int = 200, seed: int = 0) -> float:
+    """
+    Largest absolute difference between FFTSmoother.smooth and the real part of smooth_data_reference over random
+    price windows, the window sizes and SMOOTHING values used by the Traders.
+    """
+    rng = np.random.default_rng(seed)
+    smoother = FFTSmoother()
+    worst = 0.0
+    for n in (4, 7, 8, 10, 32, 33, 100):
+        for smoothing in (0.0, 0.5, 0.7, 0.9, 0.99):
+            for _ in range(trials // 10):
+                z = list(5000 + np.cumsum(rng.normal(0, 2, n)))
+                reference = np.real(np.array(smooth_data_reference(z, smoothing)))
+                worst = max(worst, float(np.max(np.abs(smoother.smooth(z, smoothing) - reference))))
+                worst = max(worst, float(np.max(np.abs(smoother.matrix(n, smoothing) @ np.array(z) - reference))))
+    return worst
+
+
+if __name__ == '__main__':
+    error = check_equivalence()
+    print(f"max abs difference vs smooth_data: {error:.3e}")
+    assert error < 1e-6, "FFTSmoother does not match smooth_data"
@@ -0,0 +1,165 @@
+from typing import Any, Callable, Dict, List, Tuple
+from array import array
+from Basket import BasketSpread
+from RingBuffer import RingBuffer
+from RollingStats import RollingStats
+import base64
+import json
+import time
+
+# Author: Alex Morrow
+# Schema-driven traderData codec, a drop-in for `jsonpickle.encode(self)` / `jsonpickle.decode(state.traderData)`.
+# Only the listed fields are written, in a fixed order with no keys or class metadata, and float histories are packed
+# as raw float32/float64 bytes in base64 instead of JSON numbers.
+#
+#   CODEC = StateCodec({'position': 'json', 'star_cache': 'floats', 'basket_mid_prices': 'float_dict'})
+#   if state.traderData:
+#       CODEC.load(self, state.traderData)
+#   ...
+#   return result, conversions, CODEC.save(self)
+
+VERSION = 1
+
+
+def pack_floats(values) -> str:
+    """
+    Pack as float32 when that is lossless (mid prices and half-tick prices always are), otherwise float64.
+    The typecode is the first character of the result.
+    """
+    values = list(values)
+    packed = array('f', values)
+    if packed.tolist() != values:
+        packed = array('d', values)
+    return packed.typecode + base64.b64encode(packed.tobytes()).decode('ascii')
+
+
+def unpack_floats(data: str) -> List[float]:
+    values = array(data[0])
+    values.frombytes(base64.b64decode(data[1:]))
+    return values.tolist()
+
+
+def _rolling_from_state(state) -> RollingStats:
+    stats = RollingStats.__new__(RollingStats)
+    stats.__setstate__(state)
+    return stats
+
+
+def _basket_from_state(state) -> BasketSpread:
+    spread = BasketSpread.__new__(BasketSpread)
+    spread.__setstate__(state)
+    return spread
+
+
+# kind -> (encode, decode)
+KINDS: Dict[str, Tuple[Callable[[Any], Any], Callable[[Any], Any]]] = {
+    'json': (lambda v: v, lambda v: v),
+    'floats': (pack_floats, unpack_floats),
+    'float_dict': (lambda d: {k: pack_floats(v) for k, v in d.items()},
+                   lambda d: {k: unpack_floats(v) for k, v in d.items()}),
+    'ring': (lambda r: r.to_state(), RingBuffer.from_state),
+    'rolling': (lambda r: r.__getstate__(), _rolling_from_state),
+    'basket': (lambda b: b.__getstate__(), _basket_from_state),
+}
+
+
+class StateCodec:
+    """
+    Encode/decode a fixed set of Trader attributes to a compact string.
+
+    Args:
+        fields (Dict[str, str]): Attribute name -> kind, in the order they are written. Kinds:
+            'json'       any JSON value (ints, floats, bools, None, str, dicts/lists of those)
+            'floats'     list of floats, packed as float32 if lossless else float64
+            'float_dict' dict of str -> list of floats, each list packed like 'floats'
+            'ring'       RingBuffer
+            'rolling'    RollingStats
+            'basket'     BasketSpread
+    """
+
+    def __init__(self, fields: Dict[str, str]):
+        unknown = {kind for kind in fields.values() if kind not in KINDS}
+        if unknown:
+            raise ValueError(f"Unknown field kinds {sorted(unknown)}, expected one of {sorted(KINDS)}")
+        self.fields = list(fields.items())
+
+    def save(self, obj) -> str:
+        """
+        Returns:
+            str: traderData for the fields of obj.
+        """
+        payload = [VERSION, len(self.fields)]
+        for name, kind in self.fields:
+            payload.append(KINDS[kind][0](getattr(obj, name)))
+        return json.dumps(payload, separators=(',', ':'))
+
+    def load(self, obj, data: str) -> None:
+        """
+        Restore the fields saved by save() onto obj, other attributes are left alone.
+        """
+        payload = json.loads(data)
+        if payload[0] != VERSION or payload[1] != len(self.fields):
+            raise ValueError(f"traderData was written by a different schema (version {payload[0]}, {payload[1]} fields)")
+        for (name, kind), value in zip(self.fields, payload[2:]):
+            setattr(obj, name, KINDS[kind][1](value))
+
+
+# Benchmark ---------------------------------------------------------------------------------------------------------
+
+ROUND3_SCHEMA = {
+    'position': 'json', 'position_limits': 'json',
+    'star_cache': 'floats', 'star_window_size': 'json',
+    'am_remaining_quantity': 'json', 'am_partially_closed': 'json', 'am_latest_price': 'json',
+    'basket_mid_prices': 'float_dict', 'spread': 'floats', 'basket_components': 'json', 'partially_closed': 'json',
+}
+
+ORCHID_SCHEMA = {
+    'position': 'json', 'orchid_data_dict': 'float_dict', 'counter': 'json', 'predictions': 'floats', 'island_prices': 'floats',
+}
+
+
+def _timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark(ticks: int = 10000, repeat: int = 20) -> None:
+    """
+    Compare jsonpickle with StateCodec on the Round3 and OrchidIsland Trader state after `ticks` ticks of history.
+    """
+    import jsonpickle
+    import random
+    import Round3
+    import OrchidIsland
+
+    rng = random.Random(0)
+    round3 = Round3.Trader()
+    round3.star_cache = [5040 + rng.randint(-10, 10) / 2 for _ in range(round3.star_window_size)]
+    for product in round3.basket_mid_prices:
+        round3.basket_mid_prices[product] = [1000 + rng.randint(-200, 200) / 2 for _ in range(ticks)]
+    round3.spread = [rng.gauss(380, 70) for _ in range(ticks)]
+
+    orchids = OrchidIsland.Trader()
+    for column in orchids.orchid_data_dict:
+        orchids.orchid_data_dict[column] = [1100 + rng.gauss(0, 20) for _ in range(ticks)]
+    orchids.orchid_data_dict['timestamp'] = [100.0 * i for i in range(ticks)]
+
+    for name, trader, schema in [('Round3', round3, ROUND3_SCHEMA), ('OrchidIsland', orchids, ORCHID_SCHEMA)]:
+        codec = StateCodec(schema)
+        pickled = jsonpickle.encode(trader)
+        packed = codec.save(trader)
+        target = type(trader)()
+        codec.load(target, packed)
+        assert all(getattr(target, field) == getattr(trader, field) for field in schema), f"{name} did not round trip"
+
+        print(f"{name} ({ticks} ticks of history)")
+        print(f"  jsonpickle  {len(pickled):>9} bytes  encode {1000 * _timed(lambda: jsonpickle.encode(trader), repeat):8.3f} ms"
+              f"  decode {1000 * _timed(lambda: jsonpickle.decode(pickled), repeat):8.3f} ms")
+        print(f"  StateCodec  {len(packed):>9} bytes  encode {1000 * _timed(lambda: codec.save(trader), repeat):8.3f} ms"
+              f"  decode {1000 * _timed(lambda: codec.load(target, packed), repeat):8.3f} ms")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,123 @@
+from typing import Callable, Dict, List, Tuple
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Author: Alex Morrow
+# Tracks traderData size and codec time tick by tick during a backtest, so unbounded state is caught before
+# submission rather than when the platform truncates it or run() times out.
+
+
+class StateLimitExceeded(Exception):
+    """
+    Raised by StateMonitor.record when traderData or its codec time crosses a configured ceiling.
+    """
+
+
+class StateMonitor:
+    """
+    Per-tick record of len(traderData) and decode/encode time.
+
+    Decode/encode times come from the Trader's own Profiler sections named 'decode' and 'encode' when it has them.
+    Otherwise, when a decoder is given, decode time is measured here by running it on the traderData the Trader
+    returned, and encode time is left as NaN. The decoder has to be the one the Trader uses (jsonpickle.decode for
+    most of them, StateCodec traderData is not meaningful to jsonpickle), and it runs a second decode every tick.
+
+    Args:
+        max_bytes (int, optional): Fail the run once traderData is longer than this.
+        max_codec_ms (float, optional): Fail the run once decode + encode time in one tick exceeds this.
+        decoder (Callable[[str], object], optional): Used to time decoding when the Trader has no 'decode'
+            section. Defaults to None, which only records what the Trader's sections report.
+    """
+
+    def __init__(self, max_bytes: int = None, max_codec_ms: float = None, decoder: Callable[[str], object] = None):
+        self.max_bytes = max_bytes
+        self.max_codec_ms = max_codec_ms
+        self.decoder = decoder
+        self.timestamps: List[int] = []
+        self.sizes: List[int] = []
+        self.decode_ms: List[float] = []
+        self.encode_ms: List[float] = []
+
+    def _section_ms(self, sections: Dict[Tuple[str, str], float], name: str) -> float:
+        seconds = [value for (section, _), value in sections.items() if section == name]
+        return 1000 * sum(seconds) if seconds else math.nan
+
+    def record(self, timestamp: int, trader_data: str, sections: Dict[Tuple[str, str], float] = None) -> None:
+        """
+        Record one tick and enforce the ceilings.
+
+        Args:
+            timestamp (int): Tick timestamp.
+            trader_data (str): traderData returned by run() on this tick.
+            sections (Dict[Tuple[str, str], float], optional): The profiler's (section, product) -> seconds for the tick.
+        """
+        sections = sections or {}
+        size = len(trader_data or '')
+        decode_ms = self._section_ms(sections, 'decode')
+        encode_ms = self._section_ms(sections, 'encode')
+        if math.isnan(decode_ms) and self.decoder is not None and trader_data:
+            start = time.perf_counter()
+            try:
+                self.decoder(trader_data)
+                decode_ms = 1000 * (time.perf_counter() - start)
+            except Exception:
+                decode_ms = math.nan
+
+        self.timestamps.append(timestamp)
+        self.sizes.append(size)
+        self.decode_ms.append(decode_ms)
+        self.encode_ms.append(encode_ms)
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            raise StateLimitExceeded(f"traderData is {size} bytes at timestamp {timestamp}, ceiling is {self.max_bytes}")
+        codec_ms = np.nansum([decode_ms, encode_ms])
+        if self.max_codec_ms is not None and codec_ms > self.max_codec_ms:
+            raise StateLimitExceeded(f"traderData decode + encode took {codec_ms:.2f} ms at timestamp {timestamp}, ceiling is {self.max_codec_ms} ms")
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame({'timestamp': self.timestamps, 'bytes': self.sizes, 'decode_ms': self.decode_ms, 'encode_ms': self.encode_ms})
+
+    def growth_per_1000_ticks(self) -> float:
+        """
+        Least-squares slope of traderData size, in bytes per 1000 ticks. Close to 0 for bounded state.
+        """
+        if len(self.sizes) < 2:
+            return 0.0
+        slope = np.polyfit(np.arange(len(self.sizes)), np.asarray(self.sizes, dtype=np.float64), 1)[0]
+        return 1000 * float(slope)
+
+    def summary(self) -> str:
+        if not self.sizes:
+            return 'traderData: no ticks recorded'
+        decode = np.asarray(self.decode_ms)
+        line = f"traderData: final {self.sizes[-1]} bytes, max {max(self.sizes)} bytes, growth {self.growth_per_1000_ticks():.0f} bytes/1000 ticks"
+        if not np.isnan(decode).all():
+            line += f", decode p99 {np.nanpercentile(decode, 99):.3f} ms"
+        return line
+
+    def save(self, path: str, label: str = '') -> None:
+        """
+        Write the growth curve as CSV, plus a PNG next to it when matplotlib is installed.
+        """
+        frame = self.frame()
+        frame.to_csv(path, index=False)
+        try:
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+        except ImportError:
+            return
+        fig, (ax_size, ax_time) = plt.subplots(2, 1, sharex=True, figsize=(10, 6))
+        ax_size.plot(frame['timestamp'], frame['bytes'])
+        ax_size.set_ylabel('traderData bytes')
+        ax_size.set_title(label or 'traderData growth')
+        ax_time.plot(frame['timestamp'], frame['decode_ms'], label='decode')
+        ax_time.plot(frame['timestamp'], frame['encode_ms'], label='encode')
+        ax_time.set_ylabel('ms')
+        ax_time.set_xlabel('timestamp')
+        ax_time.legend()
+        fig.savefig(os.path.splitext(path)[0] + '.png')
+        plt.close(fig)
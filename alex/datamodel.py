@@ -1,4 +1,7 @@
 import json
+import collections
+import collections.abc
+from array import array
 from typing import Dict, List
 from json import JSONEncoder
 import jsonpickle
@@ -11,7 +14,23 @@ UserId = str
 ObservationValue = int
 
 
+# Listing, Order, Trade and OrderDepth are created thousands of times per backtested day, so they use __slots__
+# instead of a per-instance __dict__. Constructors and attributes are unchanged.
+
+
+def _public_fields(o) -> dict:
+    if hasattr(o, '__dict__'):
+        return o.__dict__
+    if isinstance(o, OrderBatch):
+        return list(o)
+    if isinstance(o, collections.abc.Mapping):
+        # Read-only mappings such as LazyState's per-tick order_depths, built out in full when written out
+        return dict(o)
+    return {name: getattr(o, name) for name in o.__slots__ if not name.startswith('_')}
+
+
 class Listing:
+    __slots__ = ('symbol', 'product', 'denomination')
 
     def __init__(self, symbol: Symbol, product: Product, denomination: Product):
         self.symbol = symbol
@@ -42,6 +61,7 @@ class Observation:
      
 
 class Order:
+    __slots__ = ('symbol', 'price', 'quantity')
 
     def __init__(self, symbol: Symbol, price: int, quantity: int) -> None:
         self.symbol = symbol
@@ -56,13 +76,84 @@ class Order:
     
 
 class OrderDepth:
+    __slots__ = ('buy_orders', 'sell_orders', '_ladders')
 
     def __init__(self):
         self.buy_orders: Dict[int, int] = {}
         self.sell_orders: Dict[int, int] = {}
+        self._ladders = None
+
+    # Sorted views, built once on first read and shared by every component that looks at this product in the tick.
+    # The books are filled in after construction, so nothing is computed up front. Call clear_cache() after
+    # mutating buy_orders/sell_orders.
+
+    def clear_cache(self) -> None:
+        self._ladders = None
+
+    def _build_ladders(self):
+        if self._ladders is None:
+            bids = collections.OrderedDict(sorted(self.buy_orders.items(), reverse=True))
+            asks = collections.OrderedDict(sorted(self.sell_orders.items()))
+            cum_bid, cum_ask = [], []
+            total = 0
+            for vol in bids.values():
+                total += vol
+                cum_bid.append(total)
+            total = 0
+            for vol in asks.values():
+                total += -vol
+                cum_ask.append(total)
+            self._ladders = (bids, asks, cum_bid, cum_ask)
+        return self._ladders
+
+    @property
+    def bid_ladder(self) -> Dict[int, int]:
+        """Buy orders, best (highest) price first."""
+        return self._build_ladders()[0]
+
+    @property
+    def ask_ladder(self) -> Dict[int, int]:
+        """Sell orders, best (lowest) price first, volumes negative as on the exchange."""
+        return self._build_ladders()[1]
+
+    @property
+    def cumulative_bid_depth(self) -> List[int]:
+        """Total bid volume available down to each level of bid_ladder."""
+        return self._build_ladders()[2]
+
+    @property
+    def cumulative_ask_depth(self) -> List[int]:
+        """Total ask volume (positive) available up to each level of ask_ladder."""
+        return self._build_ladders()[3]
+
+    @property
+    def best_bid(self):
+        return next(iter(self.bid_ladder), None)
+
+    @property
+    def best_ask(self):
+        return next(iter(self.ask_ladder), None)
+
+    @property
+    def best_bid_volume(self) -> int:
+        best = self.best_bid
+        return self.buy_orders[best] if best is not None else 0
+
+    @property
+    def best_ask_volume(self) -> int:
+        best = self.best_ask
+        return self.sell_orders[best] if best is not None else 0
+
+    @property
+    def mid_price(self):
+        best_bid, best_ask = self.best_bid, self.best_ask
+        if best_bid is None or best_ask is None:
+            return None
+        return (best_bid + best_ask) / 2
 
 
 class Trade:
+    __slots__ = ('symbol', 'price', 'quantity', 'buyer', 'seller', 'timestamp')
 
     def __init__(self, symbol: Symbol, price: int, quantity: int, buyer: UserId=None, seller: UserId=None, timestamp: int=0) -> None:
         self.symbol = symbol
@@ -79,6 +170,40 @@ class Trade:
         return "(" + self.symbol + ", " + self.buyer + " << " + self.seller + ", " + str(self.price) + ", " + str(self.quantity) + ", " + str(self.timestamp) + ")"
 
 
+class OrderBatch:
+    """
+    Struct-of-arrays orders for one symbol, for emitting many orders without an Order object each.
+
+    Local only: this repo's Backtester accepts it in place of a List[Order] in the result dict, the exchange is not
+    known to, so a submission should return batch.to_orders(). Iterating yields Order objects, so anything that
+    loops over a product's orders keeps working.
+    """
+    __slots__ = ('symbol', 'prices', 'quantities')
+
+    def __init__(self, symbol: Symbol, prices=(), quantities=()) -> None:
+        self.symbol = symbol
+        self.prices = array('q', prices)
+        self.quantities = array('q', quantities)
+
+    def append(self, price: int, quantity: int) -> None:
+        self.prices.append(price)
+        self.quantities.append(quantity)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def __iter__(self):
+        symbol = self.symbol
+        for price, quantity in zip(self.prices, self.quantities):
+            yield Order(symbol, price, quantity)
+
+    def to_orders(self) -> List[Order]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        return repr(self.to_orders())
+
+
 class TradingState(object):
 
     def __init__(self,
@@ -100,10 +225,10 @@ class TradingState(object):
         self.observations = observations
         
     def toJSON(self):
-        return json.dumps(self, default=lambda o: o.__dict__, sort_keys=True)
+        return json.dumps(self, default=_public_fields, sort_keys=True)
 
     
 class ProsperityEncoder(JSONEncoder):
 
         def default(self, o):
-            return o.__dict__
\ No newline at end of file
+            return _public_fields(o)